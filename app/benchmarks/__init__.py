@@ -0,0 +1,5 @@
+"""Benchmarks module.
+
+Run benchmarks from the application directory, e.g.
+`python -m benchmarks.pending_posts`.
+"""
@@ -0,0 +1,129 @@
+"""Storage backends benchmark.
+
+Runs the operation mix of admins, tags, banned senders and pending posts
+databases against each storage backend and reports operations per second.
+"""
+import random
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable, Dict
+
+from utils.backends import BACKENDS, Backend, get_backend
+from utils.database import PendingPosts
+
+OPERATIONS = 5_000
+# Slow backends are measured for limited time
+DURATION = 3.0
+ADMINS = 20
+TAGS = 40
+BANS = 1_000
+QUEUE = 500
+
+
+def admins_mix(backend: Backend, rnd: random.Random) -> Callable[[], None]:
+    """Permission checks with rare sign updates."""
+    backend.insert_many({'id': admin_id, 'username': f'admin{admin_id}',
+                         'fullname': 'Admin', 'sign': ''} for admin_id in range(ADMINS))
+
+    def operation():
+        admin_id = rnd.randrange(ADMINS)
+        if rnd.random() < 0.01:
+            backend.update({'sign': 'sign'}, id=admin_id)
+        else:
+            backend.get(id=admin_id)
+    return operation
+
+
+def tags_mix(backend: Backend, rnd: random.Random) -> Callable[[], None]:
+    """Tags listing with rare adding and removing."""
+    backend.insert_many({'tag': f'#Tag{tag}'} for tag in range(TAGS))
+
+    def operation():
+        if rnd.random() < 0.05:
+            tag = f'#Tag{rnd.randrange(TAGS * 2)}'
+            if not backend.remove(tag=tag):
+                backend.insert({'tag': tag})
+        else:
+            backend.all()
+    return operation
+
+
+def banned_senders_mix(backend: Backend, rnd: random.Random) -> Callable[[], None]:
+    """Ban checks of every group message with rare bans and unbans."""
+    backend.insert_many({'sender_id': str(sender_id), 'date': 0, 'expires': 1}
+                        for sender_id in range(BANS))
+
+    def operation():
+        sender_id = str(rnd.randrange(BANS * 10))
+        chance = rnd.random()
+        if chance < 0.01:
+            backend.upsert({'sender_id': sender_id, 'date': 0, 'expires': 1},
+                           sender_id=sender_id)
+        elif chance < 0.02:
+            backend.remove(sender_id=sender_id)
+        else:
+            backend.get(sender_id=sender_id)
+    return operation
+
+
+def pending_posts_mix(backend: Backend, rnd: random.Random) -> Callable[[], None]:
+    """Moderation of a post: fan-out to 3 admins, accept with two tags."""
+    def document(msg_id: int, admin_id: int) -> Dict:
+        return {'msg_id': msg_id, 'admin_id': admin_id, 'message_id': msg_id,
+                'html_text': 'Текст объявления', 'tags': None, 'sign': None,
+                'sender': {'chat_id': str(rnd.randrange(BANS)), 'verbose_name': 'User'}}
+
+    backend.insert_many(document(msg_id, admin_id)
+                        for msg_id in range(QUEUE) for admin_id in range(3))
+    state = {'next': QUEUE}
+
+    def operation():
+        msg_id = state['next']
+        state['next'] += 1
+        backend.insert_many(document(msg_id, admin_id) for admin_id in range(3))
+        moderated = msg_id - QUEUE
+        admin_id = rnd.randrange(3)
+        backend.get(msg_id=moderated, admin_id=admin_id)
+        backend.update({'sign': 'sign', 'tags': None}, msg_id=moderated, admin_id=admin_id)
+        for tags in (['#Tag1'], ['#Tag1', '#Tag2']):
+            backend.get(msg_id=moderated, admin_id=admin_id)
+            backend.update({'tags': tags}, msg_id=moderated, admin_id=admin_id)
+        backend.get(msg_id=moderated, admin_id=admin_id)
+        backend.remove(msg_id=moderated, admin_id=admin_id)
+    return operation
+
+
+MIXES = {
+    'admins': (admins_mix, ('id',)),
+    'tags': (tags_mix, ('tag',)),
+    'banned_senders': (banned_senders_mix, ('sender_id',)),
+    'pending_posts': (pending_posts_mix, PendingPosts.indexes),
+}
+
+
+def bench(kind: str, name: str, path: str) -> float:
+    """Return operations per second of database mix on backend."""
+    make_mix, indexes = MIXES[name]
+    backend = get_backend(f'{name}_{kind}', indexes, kind=kind, path=path)
+    operation = make_mix(backend, random.Random(0))
+    started = perf_counter()
+    done = 0
+    while done < OPERATIONS and perf_counter() - started < DURATION:
+        operation()
+        done += 1
+    backend.flush()
+    return done / (perf_counter() - started)
+
+
+def main():
+    """Run benchmark."""
+    with TemporaryDirectory() as tmp:
+        print('Operations per second')
+        print(f'{"database":>16}' + ''.join(f'{kind:>10}' for kind in BACKENDS))
+        for name in MIXES:
+            print(f'{name:>16}' + ''.join(f'{bench(kind, name, tmp):>10.0f}'
+                                         for kind in BACKENDS))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Emoji counter benchmark.
+
+Compares `count_emoji` with limit of `Bot` against `emoji.emoji_count` on
+captions of growing length: plain text, text with emoji at the end and
+emoji-heavy text with skin tones and ZWJ sequences. Before timing counts of
+both are checked to be equal on random well-formed texts.
+"""
+import random
+from timeit import timeit
+
+from emoji import EMOJI_DATA, emoji_count
+
+from utils.premoderation.emoji_counter import count_emoji
+
+LIMIT = 5
+LENGTHS = (200, 1_000, 3_500)
+CALLS = 50
+CHECKS = 5_000
+WORDS = ('продам', 'куплю', 'велосипед', 'недорого', 'звоните', '8-999-123-45-67', '100₽',
+         '#2', '№5')
+EMOJI = ('😀', '🔥', '✅', '👍🏽', '👩🏻‍💻', '👨‍👩‍👧‍👦', '🏳️‍🌈', '🇷🇺', '1️⃣', '❤️')
+
+
+def make_text(rnd: random.Random, length: int, emoji_rate: float) -> str:
+    """Make text of words, `emoji_rate` of tokens are emoji."""
+    tokens = []
+    while sum(map(len, tokens)) < length:
+        tokens.append(rnd.choice(EMOJI) if rnd.random() < emoji_rate else rnd.choice(WORDS))
+    return ' '.join(tokens)[:length]
+
+
+def check(rnd: random.Random) -> None:
+    """Check counts on random texts of emoji sequences, components and words."""
+    sequences = list(EMOJI_DATA)
+    for _ in range(CHECKS):
+        text = ''.join(rnd.choice(sequences) if rnd.random() < 0.4
+                       else rnd.choice(WORDS + ('©', '™', '🏻', '️', '⃣', ' ')) for _ in range(30))
+        expected = emoji_count(text)
+        assert count_emoji(text) == expected, text
+        assert count_emoji(text, LIMIT) == min(expected, LIMIT + 1), text
+
+
+def bench(func) -> float:
+    """Return mean time (ms) of func call."""
+    return timeit(func, number=CALLS) / CALLS * 1e3
+
+
+def main():
+    """Run benchmark."""
+    rnd = random.Random(0)
+    check(rnd)
+    print(f'Counts are equal on {CHECKS} random texts\n')
+    print(f'Emoji count with limit {LIMIT}, ms')
+    print(f'{"caption":>24}{"length":>8}{"emoji":>8}{"emoji_count":>13}{"count_emoji":>13}')
+    for name, emoji_rate, at_end in (('plain', 0, False), ('emoji at the end', 0, True),
+                                     ('emoji-heavy', 0.3, False)):
+        for length in LENGTHS:
+            text = make_text(rnd, length, emoji_rate)
+            if at_end:
+                text += ''.join(EMOJI)
+            print(f'{name:>24}{len(text):>8}{emoji_count(text):>8}'
+                  f'{bench(lambda: emoji_count(text)):>13.3f}'
+                  f'{bench(lambda: count_emoji(text, LIMIT)):>13.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""Outbound scheduler benchmark.
+
+Starts local fake Bot API, which enforces Telegram limits (global, private
+chat and group) and answers 429 with `retry_after` as Telegram does, and
+points `telebot` to it. Then replays a posting burst: for every post the
+group message is deleted, info message is sent to the group and post is
+sent to admins, admins' messages are edited and info message is deleted.
+The burst is replayed by bare bot and by bot wrapped by `OutboundScheduler`,
+and both report failed requests, 429 answers, time and latency by priority.
+Limits are scaled down by `SPEEDUP` times, so the run takes seconds.
+
+Usage:
+    python -m benchmarks.outbound [--posts 40] [--admins 10]
+"""
+import argparse
+import asyncio
+from collections import Counter, defaultdict
+from statistics import mean
+from time import perf_counter
+from typing import Dict, List
+from urllib.parse import parse_qsl
+
+from aiohttp import web
+from telebot import asyncio_helper
+from telebot.async_telebot import AsyncTeleBot
+
+from utils.logger import log
+from utils.outbound import (GLOBAL_LIMIT, GROUP_LIMIT, PRIVATE_CHAT_LIMIT, METHODS,
+                            OutboundScheduler)
+from utils.ratelimit import TokenBucket
+
+SPEEDUP = 10
+HOST = '127.0.0.1'
+PORT = 8089
+TOKEN = '1:fake'
+GROUP_ID = -1001234567890
+
+
+def scaled(limit):
+    """Scale period of limit down by `SPEEDUP`."""
+    capacity, period = limit
+    return capacity, period / SPEEDUP
+
+
+class FakeBotApi:
+    """Fake Bot API, which limits requests as Telegram does."""
+
+    def __init__(self):
+        self.global_bucket = TokenBucket(*scaled(GLOBAL_LIMIT))
+        self.private_bucket = TokenBucket(*scaled(PRIVATE_CHAT_LIMIT))
+        self.group_bucket = TokenBucket(*scaled(GROUP_LIMIT))
+        self.answers = Counter()
+        self.message_id = 0
+
+    def limit(self, method: str, chat_id: int) -> float:
+        """Register request, return `retry_after` if it is over limit, else 0."""
+        buckets = [(self.global_bucket, 'global')]
+        if method not in ('deletemessage', 'answercallbackquery'):
+            buckets.append((self.group_bucket if chat_id < 0 else self.private_bucket, chat_id))
+        for bucket, key in buckets:
+            if bucket.retry_after(key) > 0:
+                return bucket.retry_after(key)
+        for bucket, key in buckets:
+            bucket.hit(key)
+        return 0.0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Answer Bot API method call."""
+        method = request.match_info['method'].lower()
+        # telebot sends form in body of GET requests as well
+        data = {**request.query, **dict(parse_qsl(await request.text()))}
+        chat_id = int(data.get('chat_id', 0))
+        retry_after = self.limit(method, chat_id)
+        if retry_after:
+            self.answers['429'] += 1
+            return web.json_response({
+                'ok': False, 'error_code': 429,
+                'description': f'Too Many Requests: retry after {retry_after:.3f}',
+                'parameters': {'retry_after': retry_after},
+            })
+        self.answers['200'] += 1
+        if method == 'deletemessage':
+            return web.json_response({'ok': True, 'result': True})
+        self.message_id += 1
+        return web.json_response({'ok': True, 'result': {
+            'message_id': int(data.get('message_id', 0)) or self.message_id,
+            'date': 0,
+            'chat': {'id': chat_id, 'type': 'supergroup' if chat_id < 0 else 'private'},
+            'text': data.get('text', ''),
+        }})
+
+
+async def post_burst(bot: AsyncTeleBot, posts: int, admins: int) -> Dict:
+    """Replay posting burst, collect failures and latency by priority."""
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    failures = Counter()
+
+    async def call(name: str, *args, **kwargs):
+        started = perf_counter()
+        try:
+            return await getattr(bot, name)(*args, **kwargs)
+        except asyncio_helper.ApiTelegramException as ex:
+            failures[ex.error_code] += 1
+            return None
+        finally:
+            latencies[METHODS[name][0].name].append(perf_counter() - started)
+
+    async def post(message_id: int):
+        sent = await asyncio.gather(
+            call('delete_message', GROUP_ID, message_id),
+            call('send_message', GROUP_ID, 'Ваше сообщение отправлено на модерацию'),
+            *(call('send_message', admin_id, f'Пост {message_id}')
+              for admin_id in range(1, admins + 1)))
+        info, admin_messages = sent[1], sent[2:]
+        await asyncio.gather(*(call('edit_message_text', 'Опубликовано', msg.chat.id,
+                                    msg.message_id)
+                               for msg in admin_messages if msg is not None))
+        if info is not None:
+            await call('delete_message', GROUP_ID, info.message_id)
+
+    started = perf_counter()
+    await asyncio.gather(*(post(message_id) for message_id in range(1, posts + 1)))
+    return {
+        'time': perf_counter() - started,
+        'failed': sum(failures.values()),
+        'latency': {name: mean(samples) for name, samples in latencies.items()},
+    }
+
+
+async def run(posts: int, admins: int) -> None:
+    """Run burst against fake Bot API with and without scheduler."""
+    for name in ('bare bot', 'scheduler'):
+        api = FakeBotApi()
+        app = web.Application()
+        app.router.add_route('*', '/bot{token}/{method}', api.handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, HOST, PORT).start()
+
+        bot = AsyncTeleBot(TOKEN)
+        outbound = None
+        if name == 'scheduler':
+            outbound = OutboundScheduler(scaled(GLOBAL_LIMIT), scaled(PRIVATE_CHAT_LIMIT),
+                                         scaled(GROUP_LIMIT))
+            outbound.wrap(bot)
+        report = await post_burst(bot, posts, admins)
+        await runner.cleanup()
+
+        latency = ', '.join(f'{priority} {seconds * 1000:.0f}'
+                            for priority, seconds in report['latency'].items())
+        print(f'{name}: {report["time"]:.2f} s, failed {report["failed"]}, '
+              f'429 answers {api.answers["429"]}, ok {api.answers["200"]}')
+        print(f'    mean latency, ms: {latency}')
+        if outbound is not None:
+            stats = outbound.stats()
+            print(f'    retried {stats["retried"]}, max queue depth {stats["max_depth"]}')
+    await asyncio_helper.session_manager.session.close()
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--posts', type=int, default=40, help='posts in burst')
+    parser.add_argument('--admins', type=int, default=10, help='admins to send posts to')
+    args = parser.parse_args()
+
+    asyncio_helper.API_URL = f'http://{HOST}:{PORT}/bot{{0}}/{{1}}'
+    # Retries after 429 are counted by scheduler, not logged
+    log.disabled = True
+    print(f'{args.posts} posts to {args.admins} admins, limits are {SPEEDUP} times faster')
+    asyncio.run(run(args.posts, args.admins))
+
+
+if __name__ == '__main__':
+    main()
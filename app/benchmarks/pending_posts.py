@@ -0,0 +1,126 @@
+"""Pending posts lookup benchmark.
+
+Measures lookup latency of pending posts in each storage backend for growing
+number of pending documents, sustained insert throughput and memory taken
+by a pending post.
+"""
+import json
+from tempfile import TemporaryDirectory
+from timeit import timeit
+import tracemalloc
+
+from utils.backends import BACKENDS, get_backend
+from utils.database import PendingPost, PendingPosts
+
+SIZES = (10, 100, 1_000, 10_000, 100_000)
+LOOKUPS = 1_000
+# TinyDB has no indexes, bigger tables take minutes to scan
+SCAN_LOOKUPS = 20
+SCAN_MAX_SIZE = 10_000
+INSERTS = 10_000
+MEMORY_POSTS = 1_000
+
+SENDER = {'is_group_or_channel': False, 'is_user': True, 'chat_id': '123456789',
+          'verbose_name': 'Иван Иванов', 'username': 'ivan', 'first_name': 'Иван',
+          'last_name': 'Иванов'}
+TEXT = 'Продам велосипед в отличном состоянии, торг уместен. Звоните: +7 900 000-00-00'
+# Photo message as sent by Telegram, pending posts used to keep all of it
+PAYLOAD = {
+    'message_id': 1042, 'date': 1667000000,
+    'from': {'id': 123456789, 'is_bot': False, 'first_name': 'Иван', 'last_name': 'Иванов',
+             'username': 'ivan', 'language_code': 'ru'},
+    'chat': {'id': -1001234567890, 'title': 'Доска объявлений', 'username': 'board',
+             'type': 'supergroup'},
+    'photo': [{'file_id': f'AgACAgIAAxkBAAIBQ2N{size}', 'file_unique_id': f'AQADAgAT{size}',
+               'file_size': size * 100, 'width': size, 'height': size}
+              for size in (90, 320, 800, 1280)],
+    'caption': TEXT,
+    'caption_entities': [{'offset': 62, 'length': 17, 'type': 'phone_number'},
+                         {'offset': 0, 'length': 5, 'type': 'bold'}],
+}
+
+
+def make_document(msg_id: int) -> dict:
+    """Make pending post document."""
+    return PendingPost(
+        msg_id=msg_id,
+        admin_id=1,
+        message_id=msg_id + 500_000,
+        chat_id=-1001234567890,
+        content_type='text',
+        file_id=None,
+        html_text='Текст объявления',
+        sender={**SENDER, 'chat_id': str(msg_id % 1_000)},
+    ).to_dict()
+
+
+def bench_memory(make) -> float:
+    """Return memory (bytes) taken by one document made by `make`."""
+    tracemalloc.start()
+    documents = [make(msg_id) for msg_id in range(MEMORY_POSTS)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del documents
+    return size / MEMORY_POSTS
+
+
+def full_payload(msg_id: int) -> dict:
+    """Make document in the former format: full message payload and derived fields."""
+    document = json.loads(json.dumps(PAYLOAD))
+    document.update(msg_id=msg_id, admin_id=1, html_text=TEXT,
+                    meta=f'\n\n{SENDER["verbose_name"]}', sender=dict(SENDER))
+    return document
+
+
+def compact_post(msg_id: int) -> dict:
+    """Make document of the compact pending post."""
+    return PendingPost(msg_id=msg_id, admin_id=1, message_id=1042, chat_id=-1001234567890,
+                       content_type='photo', file_id=PAYLOAD['photo'][0]['file_id'],
+                       html_text=TEXT, sender=dict(SENDER)).to_dict()
+
+
+def bench_lookup(backend, size: int) -> float | None:
+    """Return mean lookup time (us) of backend filled with given number of documents."""
+    scan = backend.name.endswith('tinydb')
+    if scan and size > SCAN_MAX_SIZE:
+        return None
+    number = SCAN_LOOKUPS if scan else LOOKUPS
+    backend.truncate()
+    backend.insert_many(make_document(msg_id) for msg_id in range(size))
+    return timeit(lambda: backend.get(msg_id=size - 1, admin_id=1), number=number) / number * 1e6
+
+
+def bench_inserts(backend) -> float:
+    """Return number of single inserts per second."""
+    backend.truncate()
+    documents = iter([make_document(msg_id) for msg_id in range(INSERTS)])
+    return INSERTS / timeit(lambda: backend.insert(next(documents)), number=INSERTS)
+
+
+def main():
+    """Run benchmark."""
+    with TemporaryDirectory() as tmp:
+        backends = {kind: get_backend(f'pending_posts_{kind}', PendingPosts.indexes,
+                                      kind=kind, path=tmp)
+                    for kind in BACKENDS}
+
+        print('Lookup latency, us')
+        print(f'{"documents":>10}' + ''.join(f'{kind:>10}' for kind in backends))
+        for size in SIZES:
+            results = (bench_lookup(backend, size) for backend in backends.values())
+            print(f'{size:>10}' + ''.join(
+                f'{"-":>10}' if result is None else f'{result:>10.2f}' for result in results))
+
+        print('\nSustained inserts, per second')
+        for kind, backend in backends.items():
+            if kind != 'tinydb':
+                print(f'{kind:>10} {bench_inserts(backend):>10.0f}')
+            backend.flush()
+
+    print('\nMemory per pending post, bytes')
+    print(f'{"payload":>10} {bench_memory(full_payload):>10.0f}')
+    print(f'{"compact":>10} {bench_memory(compact_post):>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
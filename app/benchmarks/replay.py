@@ -0,0 +1,192 @@
+"""Premoderation replay benchmark.
+
+Replays JSONL corpus of Telegram `Message` payloads (one `message.json` per
+line) through `Premoderation` configured as in `Bot`, and reports throughput,
+latency percentiles of the pipeline and of each validator and distribution
+of verdicts. Valid posts are published, as if moderators accepted all of
+them. Without corpus synthetic one is generated.
+
+Usage:
+    python -m benchmarks.replay [corpus.jsonl] [--stop-words stop_words.txt] [--json]
+    python -m benchmarks.replay --generate 10000 corpus.jsonl
+"""
+import argparse
+import asyncio
+from collections import Counter
+import json
+import logging
+import os
+from pathlib import Path
+import random
+from shutil import copyfile
+from statistics import quantiles
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from types import SimpleNamespace
+from typing import Dict, Iterator, List
+
+from telebot.types import Message
+
+from bot import Bot
+from utils.premoderation.context import MessageContext
+from utils.premoderation.premoderation import Premoderation
+from utils.storages import flush_all
+
+GENERATED = 5_000
+SENDERS = 5_000
+WORDS = ('продам', 'куплю', 'сдам', 'квартиру', 'велосипед', 'срочно', 'недорого', 'торг',
+         'центр', 'звоните', 'пишите', 'состояние', 'отличное', 'доставка', 'гарантия',
+         'услуги', 'ремонт', 'работа', 'требуется', 'опыт', 'оплата', 'ежедневно')
+EMOJI = '😀🔥✅🏠🚲💰'
+
+
+def generate(count: int, seed: int = 0) -> Iterator[Dict]:
+    """Generate payloads of group posts: plain posts, emoji-heavy, with links, long and reposts."""
+    rnd = random.Random(seed)
+    posted: List[str] = []
+    for message_id in range(1, count + 1):
+        kind = rnd.random()
+        if kind < 0.1 and posted:
+            text = rnd.choice(posted)
+        else:
+            text = ' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(8, 60)))
+            if kind < 0.2:
+                text += ' ' + ''.join(rnd.choice(EMOJI) for _ in range(rnd.randint(3, 12)))
+            elif kind < 0.3:
+                text = text * 40
+            posted.append(text)
+        entities = []
+        if 0.3 <= kind < 0.4:
+            url = 'https://example.com/offer'
+            entities.append({'type': 'url', 'offset': len(text.encode('utf-16-le')) // 2 + 1,
+                             'length': len(url)})
+            text += ' ' + url
+        payload = {
+            'message_id': message_id,
+            'date': 1_670_000_000 + message_id,
+            'chat': {'id': -1001234567890, 'type': 'supergroup'},
+            'from': {'id': rnd.randrange(SENDERS) + 1, 'is_bot': False,
+                     'first_name': 'Пользователь', 'username': None},
+        }
+        if kind >= 0.7:
+            payload['photo'] = [{'file_id': f'photo{message_id}',
+                                 'file_unique_id': f'unique{message_id}', 'width': 800,
+                                 'height': 600}]
+            payload['caption'] = text[:1000]
+            if entities:
+                payload['caption_entities'] = entities
+        else:
+            payload['text'] = text
+            if entities:
+                payload['entities'] = entities
+        yield payload
+
+
+def load(path: str) -> List[Dict]:
+    """Load payloads from JSONL file."""
+    with open(path, encoding='utf8') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """Return p50, p95 and p99 of samples in milliseconds."""
+    if len(samples) < 2:
+        value = samples[0] * 1e3 if samples else 0.0
+        return {'p50': value, 'p95': value, 'p99': value}
+    cuts = quantiles(samples, n=100)
+    return {'p50': cuts[49] * 1e3, 'p95': cuts[94] * 1e3, 'p99': cuts[98] * 1e3}
+
+
+async def replay(payloads: List[Dict]) -> Dict:
+    """Run payloads through premoderation and collect report."""
+    stub_bot = SimpleNamespace(config={'CHATS_ID_WHITELIST': '[]'}, Strings=Bot.Strings)
+    logger = logging.getLogger('replay')
+    logger.disabled = True
+    premoderation = Premoderation(stub_bot, logger)
+    premoderation.keep_samples = True
+    Bot.configure_premoderation(premoderation)
+
+    messages = [Message.de_json(payload) for payload in payloads]
+    latencies = []
+    verdicts = Counter()
+    started = perf_counter()
+    for message in messages:
+        message_started = perf_counter()
+        context = MessageContext(message)
+        result = await premoderation.process_message(context)
+        latencies.append(perf_counter() - message_started)
+        if result['status'] is Premoderation.Status.VALID:
+            # Moderators publish every valid post
+            await premoderation.remember_accept(context.filtered_text, context.sender['chat_id'])
+        verdicts[f"{result['status'].name} {result.get('validator') or ''}".strip()] += 1
+    elapsed = perf_counter() - started
+    premoderation.executor.shutdown()
+
+    return {
+        'messages': len(messages),
+        'throughput': len(messages) / elapsed,
+        'pipeline': percentiles(latencies),
+        'validators': [{'name': stats.name, 'calls': stats.calls,
+                        'declines': stats.declines, **percentiles(stats.samples)}
+                       for stats in map(premoderation.get_stats, premoderation.validators)],
+        'verdicts': dict(verdicts.most_common()),
+        'cache': premoderation.verdicts.stats(),
+    }
+
+
+def print_report(report: Dict) -> None:
+    """Print report as tables."""
+    print(f"{report['messages']} messages, {report['throughput']:.0f} messages per second")
+    print('\nLatency, ms')
+    print(f'{"":>40}{"calls":>8}{"declines":>10}{"p50":>9}{"p95":>9}{"p99":>9}')
+    rows = [{'name': 'pipeline', 'calls': report['messages'], 'declines': '',
+             **report['pipeline']}] + report['validators']
+    for row in rows:
+        print(f"{row['name']:>40}{row['calls']:>8}{row['declines']:>10}"
+              f"{row['p50']:>9.3f}{row['p95']:>9.3f}{row['p99']:>9.3f}")
+    print('\nVerdicts')
+    for verdict, count in report['verdicts'].items():
+        print(f'{verdict:>40}{count:>8}{count / report["messages"]:>10.1%}')
+    cache = report['cache']
+    print(f"\nVerdict cache: {cache['hits']} hits, {cache['misses']} misses, "
+          f"{cache['hit_rate']:.1%}")
+
+
+def main():
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('corpus', nargs='?', help='JSONL file with message payloads')
+    parser.add_argument('--generate', type=int, metavar='COUNT',
+                        help='write synthetic corpus of COUNT messages to CORPUS and exit')
+    parser.add_argument('--stop-words', help='stop words file, none are used if not set')
+    parser.add_argument('--json', action='store_true', help='print report as JSON')
+    args = parser.parse_args()
+
+    if args.generate:
+        with open(args.corpus, 'w', encoding='utf8') as file:
+            for payload in generate(args.generate):
+                file.write(json.dumps(payload, ensure_ascii=False) + '\n')
+        return
+
+    payloads = load(args.corpus) if args.corpus else list(generate(GENERATED))
+    stop_words = Path(args.stop_words).resolve() if args.stop_words else None
+    cwd = os.getcwd()
+    with TemporaryDirectory() as tmp:
+        # Snapshots of premoderation state are written to temporary directory
+        os.chdir(tmp)
+        try:
+            if stop_words is not None:
+                copyfile(stop_words, 'stop_words.txt')
+            report = asyncio.run(replay(payloads))
+            flush_all()
+        finally:
+            os.chdir(cwd)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Stop words benchmark.
+
+Compares scan time of a post of maximum length against growing stop word
+lists: Aho-Corasick automaton, regex alternation and substring checks of
+each word. Post has no stop words, so every method scans all of it.
+"""
+import random
+import re
+from time import perf_counter
+from timeit import timeit
+
+from utils.premoderation.aho_corasick import Automaton, normalize
+
+SIZES = (100, 1_000, 10_000, 50_000)
+TEXT_LENGTH = 3500
+SCANS = 20
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщыэюя'
+
+
+def make_word(rnd: random.Random) -> str:
+    """Make random word."""
+    return ''.join(rnd.choice(ALPHABET) for _ in range(rnd.randint(5, 10)))
+
+
+def make_text(rnd: random.Random) -> str:
+    """Make post of random short words, which can not contain patterns."""
+    words = []
+    while sum(len(word) + 1 for word in words) < TEXT_LENGTH:
+        words.append(''.join(rnd.choice(ALPHABET) for _ in range(rnd.randint(1, 4))))
+    return ' '.join(words)[:TEXT_LENGTH]
+
+
+def bench(func) -> float:
+    """Return mean time (ms) of func call."""
+    return timeit(func, number=SCANS) / SCANS * 1e3
+
+
+def main():
+    """Run benchmark."""
+    rnd = random.Random(0)
+    text = normalize(make_text(rnd))
+    print(f'Scan of {TEXT_LENGTH} characters post, ms')
+    print(f'{"patterns":>10}{"compile":>10}{"automaton":>10}{"regex":>10}{"substring":>10}')
+    for size in SIZES:
+        patterns = [make_word(rnd) if rnd.random() < 0.8
+                    else f'{make_word(rnd)} {make_word(rnd)}' for _ in range(size)]
+
+        started = perf_counter()
+        automaton = Automaton((pattern, 'MAT') for pattern in patterns)
+        compiled = (perf_counter() - started) * 1e3
+        regex = re.compile('|'.join(map(re.escape, (normalize(pattern).strip()
+                                                    for pattern in patterns))))
+        prepared = [normalize(pattern).strip() for pattern in patterns]
+
+        assert automaton.search(text) is None and regex.search(text) is None
+        print(f'{size:>10}{compiled:>10.1f}'
+              f'{bench(lambda: automaton.search(text)):>10.2f}'
+              f'{bench(lambda: regex.search(text)):>10.2f}'
+              f'{bench(lambda: any(pattern in text for pattern in prepared)):>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,9 @@
 """ Bot class module """
 import asyncio
+import json
+from typing import List, Optional, Union
 
-from telebot import asyncio_filters
+from telebot import asyncio_filters, asyncio_helper
 from telebot.async_telebot import AsyncTeleBot
 from telebot.util import content_type_media
 from telebot.types import Message
@@ -11,15 +13,20 @@ from handlers.admin_commands import (START_BUTTONS, get_start_commands_markup,
                                      on_send_new_post_to_group, on_sign_add,
                                      on_start_button_choose)
 from handlers.admin_configs import (cmd_add_admin, cmd_add_hashtag,
-                                    cmd_add_sign, cmd_remove_admin,
+                                    cmd_add_sign, cmd_outbound_stats,
+                                    cmd_premoderation_stats, cmd_remove_admin,
                                     cmd_remove_hashtag)
 from handlers.group import on_message_received, on_group_show_hashtags
 from handlers.private import (on_hashtag_choose, on_post_processing,
                               send_post_to_group, on_post_cancel_deleting)
+from utils.config import config as app_config
+from utils.deferred import DeferredDeletions
 from utils.helpers import get_user_link
 from utils.logger import log
+from utils.outbound import OutboundScheduler
 from utils.premoderation.premoderation import Premoderation
 from utils.states import MyStates
+from utils.storages import flush_all
 
 
 class Bot(AsyncTeleBot):
@@ -29,10 +36,12 @@ class Bot(AsyncTeleBot):
         self.config = config
         super().__init__(self.config['TOKEN'], **kwargs, parse_mode='HTML')
 
+        self.outbound = OutboundScheduler()
+        self.outbound.wrap(self)
+        self.deletions = DeferredDeletions(self)
+
         self.premoderation = Premoderation(self, log)
-        self.premoderation.limit_caption(700)
-        self.premoderation.limit_text(3500)
-        self.premoderation.limit_emoji(5)
+        self.configure_premoderation(self.premoderation)
 
         self.commands = [
             # Admin handlers
@@ -61,6 +70,16 @@ class Bot(AsyncTeleBot):
                 'commands': 'add_sign',
                 'chat_types': 'private',
             },
+            {
+                'callback': cmd_premoderation_stats,
+                'commands': 'premoderation_stats',
+                'chat_types': 'private',
+            },
+            {
+                'callback': cmd_outbound_stats,
+                'commands': 'outbound_stats',
+                'chat_types': 'private',
+            },
             # Admin button handlers
             {
                 'callback': get_start_commands_markup,
@@ -127,6 +146,21 @@ class Bot(AsyncTeleBot):
 
         self.init()
 
+    @staticmethod
+    def configure_premoderation(premoderation: Premoderation):
+        """ Set premoderation limits and validators """
+        premoderation.limit_caption(700)
+        premoderation.limit_text(3500)
+        premoderation.limit_emoji(5)
+        premoderation.forbid_links()
+        premoderation.reject_duplicates(7)
+        if posts_limit := app_config.getint('Premoderation', 'POSTS_LIMIT', fallback=3):
+            premoderation.limit_posts(
+                posts_limit,
+                hours=app_config.getfloat('Premoderation', 'POSTS_PERIOD_HOURS', fallback=24))
+        premoderation.filter_stop_words(
+            app_config.get('Premoderation', 'STOP_WORDS_PATH', fallback='stop_words.txt'))
+
     def is_main_group(self, message: Message):
         """ Check if message is from main group"""
         return str(message.chat.id) == str(self.config['CHAT_ID'])
@@ -172,10 +206,45 @@ class Bot(AsyncTeleBot):
         Start polling and run event loop
         """
         log.info("Starting polling...")
-        asyncio.run(self.polling(
+        try:
+            asyncio.run(self.run_polling())
+        finally:
+            self.shutdown()
+
+    async def run_polling(self):
+        """ Run polling
+
+        Resume deferred deletions, which were scheduled before restart, and poll
+        """
+        log.info("Deferred deletions resumed: %s", len(self.deletions))
+        self.deletions.start()
+        await self.polling(
             non_stop=True,
             skip_pending=True
-        ))
+        )
+
+    async def delete_messages(self, chat_id: Union[int, str], message_ids: List[int],
+                              timeout: Optional[int] = None) -> bool:
+        """ Delete messages
+
+        Delete up to 100 messages of chat by one request. Messages, which
+        can't be deleted, are skipped. `deleteMessages` method is missing in
+        this telebot version, so it is called directly
+        """
+        payload = {'chat_id': chat_id, 'message_ids': json.dumps(message_ids)}
+        if timeout:
+            payload['timeout'] = timeout
+        # pylint: disable=protected-access
+        return await asyncio_helper._process_request(self.token, 'deleteMessages',
+                                                     params=payload)
+
+    def shutdown(self):
+        """ Shutdown bot
+
+        Write all cached database changes to disk
+        """
+        flush_all()
+        log.info("Databases flushed")
 
     class Strings:
         """ String templates """
@@ -130,9 +130,8 @@ async def on_sign_add(message: Message, bot: Bot):
     if message.text == 'Отмена':
         await on_decline(message, bot)
     else:
-        for item in db_admins.admins:
-            if message.from_user.id == item['id']:
-                db_admins.update(item['id'], {'sign': message.html_text})
+        if db_admins.get_admin_by_id(message.from_user.id) is not None:
+            db_admins.update(message.from_user.id, {'sign': message.html_text})
         await bot.send_message(message.chat.id, 'Примечание обновлено.',
                                reply_markup=create_start_commands_markup())
         await bot.set_state(message.from_user.id, MyStates.on_start_button_choose, message.chat.id)
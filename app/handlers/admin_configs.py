@@ -6,8 +6,7 @@ import traceback
 from typing import TYPE_CHECKING, Callable, Dict
 
 from telebot.types import Message
-from tinydb.table import Document
-from utils.database import AdminDatabase, TagDatabase
+from utils.database import AdminDatabase, PendingPost, TagDatabase
 from utils.helpers import get_user_link, remove_meta_from_text
 from utils.logger import log
 
@@ -26,8 +25,7 @@ def check_permissions(user_id: int) -> bool:
     Returns:
         `bool`: Имеет ли права пользователь.
     """
-    log.info('method: check_permissions, called')
-    return user_id in [item['id'] for item in db_admins.admins]
+    return user_id in db_admins.ids
 
 
 async def cmd_add_hashtag(message: Message, bot: Bot):
@@ -108,6 +106,49 @@ async def cmd_remove_hashtag(message: Message, bot: Bot):
         await bot.reply_to(message, "Хештег удален!")
 
 
+async def cmd_premoderation_stats(message: Message, bot: Bot):
+    """Хендлер команды выводящей статистику валидаторов премодерации.
+
+    Args:
+        `message (Message)`: Объект сообщения.
+        `bot (AsyncTeleBot)`: Объект бота.
+    """
+    if not check_permissions(message.from_user.id):
+        await bot.reply_to(message, 'У вас нет прав на выполнение этой команды')
+    else:
+        lines = [
+            f"<code>{stats['name']}</code>: {stats['calls']} проверок, "
+            f"отклонено {stats['decline_rate']:.1%}, "
+            f"в среднем {stats['mean_time'] * 1000:.3f} мс, всего {stats['time']:.2f} с"
+            for stats in bot.premoderation.stats_report()
+        ]
+        cache = bot.premoderation.verdicts.stats()
+        lines.append(f"\nКеш вердиктов: {cache['hits']} попаданий, {cache['misses']} промахов "
+                     f"({cache['hit_rate']:.1%}), записей: {cache['size']}")
+        await bot.reply_to(message, 'Валидаторы в порядке проверки:\n' + '\n'.join(lines))
+
+
+async def cmd_outbound_stats(message: Message, bot: Bot):
+    """Хендлер команды выводящей состояние очереди исходящих запросов.
+
+    Args:
+        `message (Message)`: Объект сообщения.
+        `bot (AsyncTeleBot)`: Объект бота.
+    """
+    if not check_permissions(message.from_user.id):
+        await bot.reply_to(message, 'У вас нет прав на выполнение этой команды')
+    else:
+        stats = bot.outbound.stats()
+        queues = ', '.join(f'{name}: {depth}'
+                           for name, depth in stats['depth_by_priority'].items())
+        await bot.reply_to(message,
+                           f"В очереди: {stats['depth']} ({queues}), "
+                           f"максимум: {stats['max_depth']}\n"
+                           f"Отправлено: {stats['granted']}, "
+                           f"среднее ожидание {stats['mean_wait'] * 1000:.0f} мс\n"
+                           f"Повторов после 429: {stats['retried']}")
+
+
 async def cmd_add_sign(message: Message, bot: Bot):
     """Хендлер команды добавляющей приписку к сообщению.
 
@@ -122,12 +163,12 @@ async def cmd_add_sign(message: Message, bot: Bot):
         if text == '/add_sign':
             await bot.reply_to(message, 'Примечание не указано!')
         else:
-            for item in db_admins.admins:
-                if message.from_user.id == item['id']:
-                    db_admins.update(item['id'], {'sign': text})
-                    log.info(
-                        'method: cmd_add_sign, sign updated for %s, current sign: %s',
-                        item["id"], item["sign"])
+            item = db_admins.get_admin_by_id(message.from_user.id)
+            if item is not None:
+                db_admins.update(item['id'], {'sign': text})
+                log.info(
+                    'method: cmd_add_sign, sign updated for %s, current sign: %s',
+                    item["id"], item["sign"])
 
 
 def params_mapping(message_type: str, params: Dict) -> Dict:
@@ -177,29 +218,28 @@ def get_send_procedure(message_type: str, bot: Bot) -> Callable:  # pylint: disa
     return func
 
 
-def build_html_text(message: Document, remove_meta=True, add_sign=True) -> str | None:
+def build_html_text(message: PendingPost, remove_meta=True, add_sign=True) -> str | None:
     """Method for building html text from message."""
     try:
         separator = '_'*15
 
-        tags = ' '.join(list(message.get('tags') or []))
+        tags = ' '.join(list(message.tags or []))
 
-        message_body = message.get('body') or message
-        message_html_text = message_body.get('html_text')
+        message_html_text = message.html_text
 
         if remove_meta:
             message_html_text = remove_meta_from_text(message_html_text)
 
-        user_link_html = get_user_link(message['sender'])
+        user_link_html = get_user_link(message.sender)
         text_html = f"{tags}" + \
             (f"\n\n{message_html_text}" if message_html_text else '')
 
         if add_sign:
             text_html += "\n\nЕсли вас заинтересовало данное предложение напишите:\n"\
                 f"{user_link_html}\n\n"
-            if message.get('sign', None):
+            if message.sign:
                 text_html += f"{separator}"\
-                    f"\n{message.get('sign')}"
+                    f"\n{message.sign}"
 
         log.info('method: string_builder, text: %s', text_html)
 
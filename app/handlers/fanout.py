@@ -0,0 +1,205 @@
+"""Модуль рассылки постов администраторам на модерацию."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, replace
+import traceback
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Iterable, List, Mapping
+
+from telebot.asyncio_helper import ApiHTTPException, ApiTelegramException, RequestTimeout
+from utils.database import PendingPost, PendingPosts
+from utils.logger import log
+
+from handlers.admin_configs import get_params_for_message, get_send_procedure
+
+if TYPE_CHECKING:
+    from bot import Bot
+    from telebot.types import InlineKeyboardMarkup, Message
+    from utils.premoderation.context import MessageContext
+
+messages = PendingPosts()
+
+# Admin chats, which are sent to at once
+FANOUT_CONCURRENCY = 8
+SEND_ATTEMPTS = 3
+# Delay before the first retry, doubled for each next one
+RETRY_DELAY = 1.0
+# Gateway answers, which mean that request did not reach Telegram
+RETRY_STATUSES = (502, 503)
+
+MANUAL_MODE_WARNING = ("ВНИМАНИЕ! "
+                       "ПРИ АВТОМАТИЧЕСКОЙ ОБРАБОТКИ ЭТОГО СООБЩЕНИЯ ПРОИЗОШЛА ОШИБКА!!!\n"
+                       "ОБРАБОТАЙТЕ В РУЧНОМ РЕЖИМЕ\n\n")
+
+
+@dataclass(frozen=True, slots=True)
+class SendPlan:
+    """Класс представляющий неизменяемый план отправки поста администраторам.
+
+    План строится один раз на пост: метод отправки, параметры с отфильтрованным
+    текстом, медиа и разметкой, шаблон записи поста. Для каждого администратора
+    остается только вызов API и подстановка id сообщения в шаблон.
+    """
+    send: Callable[..., Awaitable[Message]]
+    params: Mapping[str, Any]
+    text_field: str
+    post: PendingPost
+
+    async def dispatch(self, chat_id: int) -> Message:
+        """Метод отправляющий пост в чат.
+
+        Args:
+            `chat_id (int)`: Id чата администратора.
+
+        Returns:
+            `Message`: Отправленное сообщение.
+        """
+        return await self.send(chat_id=chat_id, **self.params)
+
+    def pending_post(self, message: Message) -> PendingPost:
+        """Метод возвращающий запись поста для отправленного администратору сообщения."""
+        return replace(self.post, msg_id=message.message_id, admin_id=message.chat.id)
+
+    def with_text(self, text: str) -> SendPlan:
+        """Метод возвращающий план с другим текстом, если текст в плане есть."""
+        if not self.params.get(self.text_field):
+            return self
+        return replace(self, params=MappingProxyType({**self.params, self.text_field: text}))
+
+
+def build_send_plan(context: MessageContext, bot: Bot,
+                    reply_markup: InlineKeyboardMarkup) -> SendPlan:
+    """Метод строящий план отправки поста администраторам.
+
+    Args:
+        `context (MessageContext)`: Контекст сообщения группы.
+        `bot (Bot)`: Объект бота.
+        `reply_markup (InlineKeyboardMarkup)`: Разметка сообщения.
+
+    Returns:
+        `SendPlan`: План отправки.
+    """
+    message = context.message
+    params = get_params_for_message(context.filtered_text + context.meta, message)
+    params['reply_markup'] = reply_markup
+    return SendPlan(
+        send=get_send_procedure(message.content_type, bot),
+        params=MappingProxyType(params),
+        text_field=context.text_type,
+        post=PendingPost(
+            msg_id=None,
+            admin_id=None,
+            message_id=message.message_id,
+            chat_id=message.chat.id,
+            content_type=message.content_type,
+            # Params of text post keep its text under the content type
+            file_id=None if message.content_type == 'text' else params.get(message.content_type),
+            html_text=context.filtered_text,
+            sender=context.sender,
+            content_key=context.content_key,
+        ),
+    )
+
+
+def retry_delay(ex: Exception, attempt: int) -> float | None:
+    """Метод возвращающий задержку перед повтором отправки.
+
+    Повторяются только ошибки, при которых пост точно не был отправлен:
+    недоступность сервера Telegram (502, 503). Превышение
+    лимитов (429) уже повторяет `OutboundScheduler`. Таймаут не повторяется,
+    так как запрос мог дойти до Telegram и повтор отправил бы пост дважды.
+
+    Args:
+        `ex (Exception)`: Ошибка отправки.
+        `attempt (int)`: Номер неудачной попытки, начиная с 1.
+
+    Returns:
+        `float | None`: Задержка в секундах, None если ошибку не нужно повторять.
+    """
+    if isinstance(ex, ApiTelegramException):
+        status = ex.error_code
+    elif isinstance(ex, ApiHTTPException):
+        status = getattr(ex.result, 'status', None)
+    else:
+        return None
+    if status in RETRY_STATUSES:
+        return RETRY_DELAY * 2 ** (attempt - 1)
+    return None
+
+
+async def send_to_admin(plan: SendPlan, admin_id: int, fallback_text: str,
+                        semaphore: asyncio.Semaphore) -> Message | None:
+    """Метод отправляющий пост одному администратору.
+
+    Ошибки, при которых пост не был отправлен, повторяются до `SEND_ATTEMPTS`
+    раз, после остальных или последней попытки администратору отправляется
+    пост с предупреждением об обработке в ручном режиме и исходным текстом.
+    После таймаута пост мог быть доставлен, поэтому он не отправляется
+    повторно, а ошибка только записывается в лог. Ошибки не выходят за
+    пределы метода, поэтому не влияют на отправку другим администраторам.
+
+    Args:
+        `plan (SendPlan)`: План отправки.
+        `admin_id (int)`: Id администратора.
+        `fallback_text (str)`: Текст поста без форматирования.
+        `semaphore (asyncio.Semaphore)`: Ограничение одновременных запросов рассылки.
+
+    Returns:
+        `Message | None`: Сообщение на модерации, None если пост не был отправлен
+            или отправлен в ручном режиме.
+    """
+    msg = None
+    for attempt in range(1, SEND_ATTEMPTS + 1):
+        try:
+            async with semaphore:
+                msg = await plan.dispatch(admin_id)
+            break
+        except Exception as ex:  # pylint: disable=broad-except
+            if isinstance(ex, RequestTimeout):
+                log.error('method: send_to_admin, admin_id %s, post may be not delivered: %s',
+                          admin_id, ex)
+                return None
+            delay = retry_delay(ex, attempt)
+            if delay is None or attempt == SEND_ATTEMPTS:
+                log.error('Error sending procedure: %s, %s', ex, traceback.format_exc())
+                break
+            log.warning('method: send_to_admin, admin_id %s, attempt %s failed: %s, '
+                        'retry in %s s', admin_id, attempt, ex, delay)
+            await asyncio.sleep(delay)
+
+    if msg is not None:
+        messages.insert(plan.pending_post(msg))
+        log.info('method: send_to_admin, called for admin_id %s with params: %s',
+                 admin_id, plan.params)
+        return msg
+
+    try:
+        async with semaphore:
+            await plan.with_text(MANUAL_MODE_WARNING + fallback_text).dispatch(admin_id)
+    except Exception as ex:  # pylint: disable=broad-except
+        log.error('method: send_to_admin, post was not sent to admin_id %s: %s, %s',
+                  admin_id, ex, traceback.format_exc())
+    return None
+
+
+async def send_to_admins(plan: SendPlan, admin_ids: Iterable[int],
+                         fallback_text: str) -> List[Message]:
+    """Метод рассылающий пост администраторам по плану.
+
+    Администраторам пост отправляется одновременно, но не более чем в
+    `FANOUT_CONCURRENCY` запросах, поэтому время рассылки не растет линейно с
+    числом администраторов, а медленный чат не задерживает остальные.
+
+    Args:
+        `plan (SendPlan)`: План отправки.
+        `admin_ids (Iterable[int])`: Id администраторов.
+        `fallback_text (str)`: Текст поста без форматирования.
+
+    Returns:
+        `List[Message]`: Сообщения, отправленные на модерацию.
+    """
+    semaphore = asyncio.Semaphore(FANOUT_CONCURRENCY)
+    sent = await asyncio.gather(*(send_to_admin(plan, admin_id, fallback_text, semaphore)
+                                  for admin_id in admin_ids))
+    return [msg for msg in sent if msg is not None]
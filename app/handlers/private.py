@@ -3,14 +3,16 @@ from __future__ import annotations
 
 import asyncio
 from enum import Enum
+from functools import lru_cache
 from operator import itemgetter
 from typing import TYPE_CHECKING
 
 from telebot.types import (CallbackQuery, InlineKeyboardButton,
                            InlineKeyboardMarkup, Message)
-from tinydb import Query
-from utils.database import AdminDatabase, BannedSenders, MessagesToPreventDeletingDB, TagDatabase
-from utils.database import memory as messages
+from utils.config import config
+from utils.database import (AdminDatabase, BannedSenders,
+                            MessagesToPreventDeletingDB, PendingPosts,
+                            TagDatabase)
 from utils.helpers import (get_user_link, edit_message,
                            get_html_text_of_message, make_meta_string,
                            strip_hashtags)
@@ -24,6 +26,7 @@ if TYPE_CHECKING:
     from bot import Bot
 
 db_admins = AdminDatabase()
+messages = PendingPosts()
 
 
 def get_decline_command(action: str) -> str:
@@ -31,17 +34,18 @@ def get_decline_command(action: str) -> str:
     return '/post_processing decline ' + action
 
 
-async def spam_handler(call: CallbackQuery, bot: Bot):  # pylint: disable=unused-argument
+async def spam_handler(call: CallbackQuery, bot: Bot, days: int):  # pylint: disable=unused-argument
     """ Spam handler
 
     Args:
         call (CallbackQuery): CallbackQuery object.
         bot (AsyncTeleBot): Bot object.
+        days (int): Ban period in days.
     """
     log.info('Spam handler: %s', call.data)
-    sender = messages.get(Query().msg_id == call.message.id).get('sender')
-    log.info('Spamer: %s', sender)
-    BannedSenders().add(sender.get('chat_id'))
+    sender = messages.get(call.message.id, call.message.chat.id).sender
+    log.info('Spamer: %s, banned for %s days', sender, days)
+    BannedSenders().add(sender.get('chat_id'), days)
 
 
 class DeclineCommands(Enum):
@@ -55,7 +59,7 @@ class DeclineCommands(Enum):
         'command': get_decline_command('MORE_THAN_ONCE'),
         'text': 'Больше 1-го раза',
         'reason': 'Запрещена реклама офферов <b>более 1-го раза</b> в неделю.',
-        'callback': spam_handler,
+        'ban_days': 7,
     }
     SCAM = {
         'command': get_decline_command('SCAM'),
@@ -83,6 +87,12 @@ class DeclineCommands(Enum):
     }
 
 
+def get_ban_days(decline_command: DeclineCommands) -> int:
+    """ Returns ban period in days for decline reason, 0 if sender is not banned """
+    return config.getint('Bans', decline_command.name,
+                         fallback=decline_command.value.get('ban_days', 0))
+
+
 def get_decline_markup() -> InlineKeyboardMarkup:
     """ Returns cecline markup with reasons of decline """
 
@@ -96,11 +106,26 @@ def get_decline_markup() -> InlineKeyboardMarkup:
     return markup
 
 
-def get_hashtag_markup() -> InlineKeyboardMarkup:
-    """Метод создающий разметку сообщения
+def get_hashtag_markup() -> str:
+    """Метод возвращающий разметку выбора хештегов
+
+    Разметка строится один раз на каждую версию базы тегов.
 
     Returns:
-        `InlineKeyboardMarkup`: Разметка сообщения
+        `str`: Сериализованная разметка сообщения
+    """
+    return build_hashtag_markup(TagDatabase().version)
+
+
+@lru_cache(maxsize=1)
+def build_hashtag_markup(tags_version: int) -> str:  # pylint: disable=unused-argument
+    """Метод создающий разметку выбора хештегов
+
+    Args:
+        `tags_version (int)`: Версия базы тегов, ключ кеша.
+
+    Returns:
+        `str`: Сериализованная разметка сообщения
     """
     hashtag_markup = InlineKeyboardMarkup()
 
@@ -114,7 +139,7 @@ def get_hashtag_markup() -> InlineKeyboardMarkup:
     add_button('✅ Завершить выбор и отправить сообщение', 'end_button')
     add_button('🚫 Отмена', '/post_processing reset')
 
-    return hashtag_markup
+    return hashtag_markup.to_json()
 
 
 def get_cancel_deleting_markup() -> InlineKeyboardMarkup:
@@ -141,6 +166,7 @@ async def on_error_message_reply(message: Message, bot: Bot):
     params['chat_id'] = bot.config['CHAT_ID']
     params['entities'] = message.entities
     await get_send_procedure(message_type, bot)(**params)
+    await bot.premoderation.remember_accept(message.html_text, message.sender['chat_id'])
 
 
 async def delete_post_in_private_handler(call: CallbackQuery, bot: Bot, timeout: int = 10):
@@ -148,12 +174,7 @@ async def delete_post_in_private_handler(call: CallbackQuery, bot: Bot, timeout:
     chat_id = call.message.chat.id
     message_id = call.message.message_id
     await bot.edit_message_reply_markup(chat_id, message_id, reply_markup=get_cancel_deleting_markup())
-    await asyncio.sleep(timeout)
-    messages_prevent_db = MessagesToPreventDeletingDB()
-    if not messages_prevent_db.has(message_id):
-        messages_prevent_db.remove(message_id)
-        await bot.delete_message(chat_id, message_id)
-        return
+    bot.deletions.schedule(chat_id, message_id, timeout, cancellable=True)
 
 
 async def decline_handler(call: CallbackQuery, bot: Bot):
@@ -187,9 +208,12 @@ async def decline_handler(call: CallbackQuery, bot: Bot):
             if (callback := decline_command.value.get('callback')) is not None:
                 await callback(call, bot)
 
-            message_document = messages.get(Query().msg_id == call.message.id)
-            html_text = build_html_text(
-                message_document, remove_meta=False, add_sign=False)
+            if ban_days := get_ban_days(decline_command):
+                await spam_handler(call, bot, ban_days)
+
+            post = messages.get(call.message.id, call.message.chat.id)
+            bot.premoderation.remember_decline(post.content_key, decline_command.value['reason'])
+            html_text = build_html_text(post, remove_meta=False, add_sign=False)
 
             new_text = f'{html_text}'\
                 '\n\n❌ОТКЛОНЕНО❌' \
@@ -214,9 +238,8 @@ async def accept_handler(call: CallbackQuery, bot: Bot):
     """
     log.info('Accept handler: %s', call.data)
 
-    message_document = messages.get(Query().msg_id == call.message.id)
-    html_text = build_html_text(
-        message_document, remove_meta=False, add_sign=False)
+    post = messages.get(call.message.id, call.message.chat.id)
+    html_text = build_html_text(post, remove_meta=False, add_sign=False)
 
     new_text = f'{html_text}'\
         '\n\n✅ОДОБРЕНО✅'
@@ -253,18 +276,20 @@ async def on_post_processing(call: CallbackQuery, bot: Bot):
     action = call.data.split(' ')[1]
 
     message = call.message
-    saved_message = messages.get(Query().msg_id == message.id)
+    saved_message = messages.get(message.id, message.chat.id)
+
+    if saved_message is None:
+        # Пост уже опубликован или отклонен другим администратором
+        log.info('method: on_post_processing - message with id %s was already processed',
+                 message.id)
+        await bot.edit_message_reply_markup(message.chat.id, message.id, reply_markup='')
+        return
 
     admin_user = db_admins.get_admin_by_id(call.from_user.id)
     sign = admin_user.get('sign', '')
 
-    message_data = {
-        **saved_message,
-        'sign': sign,
-        'tags': None,
-    }
     message_id = messages.update(
-        message_data, Query().msg_id == saved_message['msg_id'])
+        {'sign': sign, 'tags': None}, saved_message.msg_id, message.chat.id)
     log.info('New message in db: %s', message_id)
 
     log.info('method: on_post_processing'
@@ -277,9 +302,9 @@ async def on_post_processing(call: CallbackQuery, bot: Bot):
             await decline_handler(call, bot)
         case 'reset':
             log.info('Reset message %s', message.id)
-            messages.update({'tags': None}, Query().msg_id == message.id)
-            meta = make_meta_string(saved_message['sender'])
-            new_text = saved_message.get('html_text') + meta
+            messages.update({'tags': None}, message.id, message.chat.id)
+            meta = make_meta_string(saved_message.sender)
+            new_text = saved_message.html_text + meta
 
             await edit_message(bot, message, new_text, reply_markup=create_markup())
 
@@ -298,7 +323,7 @@ async def on_hashtag_choose(call: CallbackQuery, bot: Bot):
     """
     log.info('method: on_hashtag_choose'
              'message: callback data from callback query id %s is \'%s\'', call.id, call.data)
-    saved_message = messages.get(Query().msg_id == call.message.id)
+    saved_message = messages.get(call.message.id, call.message.chat.id)
 
     if saved_message is None:
         log.error(
@@ -308,7 +333,7 @@ async def on_hashtag_choose(call: CallbackQuery, bot: Bot):
     hashtag = call.data
     log.info('message: %s', saved_message)
 
-    tags = set(saved_message.get('tags') or [])
+    tags = set(saved_message.tags or [])
     if hashtag not in tags:
         tags.add(hashtag)
     else:
@@ -318,15 +343,15 @@ async def on_hashtag_choose(call: CallbackQuery, bot: Bot):
 
     log.info('tags: %s', str(tags))
 
-    _ = messages.update({'tags': tags}, doc_ids=[saved_message.doc_id])
+    _ = messages.update({'tags': tags}, call.message.id, call.message.chat.id)
 
     log.info('update: %s', _)
 
-    message = messages.get(Query().msg_id == call.message.id)
+    message = messages.get(call.message.id, call.message.chat.id)
     log.info('\nBEFORE STRING BUILDER: %s', message)
 
     # Remove hastags and space after hastags, before readding it
-    message['html_text'] = strip_hashtags(
+    message.html_text = strip_hashtags(
         get_html_text_of_message(call.message)).strip()
 
     html__text = build_html_text(message, remove_meta=False, add_sign=False)
@@ -350,19 +375,27 @@ async def send_post_to_group(call: CallbackQuery, bot: Bot):
     log.info('call message from user: %s', call.from_user.username)
     message_type = call.message.content_type
 
-    message = messages.get(Query().msg_id == call.message.id)
+    message = messages.get(call.message.id, call.message.chat.id)
+    if message is None:
+        # Пост уже опубликован или отклонен другим администратором
+        log.info('method: send_post_to_group - message with id %s was already processed',
+                 call.message.id)
+        await bot.edit_message_reply_markup(call.message.chat.id, call.message.message_id,
+                                            reply_markup='')
+        return
     html_text = build_html_text(message)
 
     params = get_params_for_message(html_text, call.message)
     params['chat_id'] = bot.config['CHAT_ID']
 
     await get_send_procedure(message_type, bot)(**params)
+    await bot.premoderation.remember_accept(message.html_text, message.sender['chat_id'])
     await bot.edit_message_reply_markup(call.message.chat.id,
                                         message_id=call.message.message_id,
                                         reply_markup='')
     await accept_handler(call, bot)
 
-    result = messages.remove(Query().id == call.message.id)
+    result = messages.remove_copies(call.message.id, call.message.chat.id)
     log.info('method: send_message_to_group,removed resulted message from query, message: %s',
              result)
     log.info('method: send_message_to_group'
@@ -380,8 +413,8 @@ async def send_decline_notification_to_group(
     """
     log.info('call message from user: %s', call.from_user.username)
 
-    message = messages.get(Query().msg_id == call.message.id)
-    user_link = get_user_link(message['sender'])
+    message = messages.get(call.message.id, call.message.chat.id)
+    user_link = get_user_link(message.sender)
 
     # pylint: disable=line-too-long
     text_html = f'❗️{user_link}, Ваш пост отклонен модератором чата. Пожалуйста, ознакомьтесь с {bot.Strings.rules_link("правилами")} группы и попробуйте еще раз. Если вы хотите опубликовать объявление в таком виде - воспользуйтесь {bot.Strings.sponsored_link("платным размещением")}.' \
@@ -390,12 +423,11 @@ async def send_decline_notification_to_group(
 
     msg = await bot.send_message(bot.config['CHAT_ID'], text_html, disable_web_page_preview=True)
 
-    removed_message_id = messages.remove(Query().id == call.message.id)
+    removed_message_id = messages.remove_copies(call.message.id, call.message.chat.id)
     log.info('method: send_decline_notification_to_group,removed resulted message from query, message: %s',
              removed_message_id)
     log.info('method: send_decline_notification_to_group'
              'message: message with id %s '
              'message: \'%s\' is sended', call.message.id, text_html)
 
-    await asyncio.sleep(60)
-    await bot.delete_message(chat_id=msg.chat.id, message_id=msg.id)
+    bot.deletions.schedule(msg.chat.id, msg.id, 60)
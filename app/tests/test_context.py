@@ -0,0 +1,37 @@
+"""Tests of message context."""
+import pytest
+from telebot.types import Message
+
+from utils.premoderation.context import MessageContext
+
+TEXT = 'Продам велосипед в отличном состоянии, недорого'
+
+
+def context(text: str, entities=None, photo: str | None = None) -> MessageContext:
+    """Make context of group message."""
+    payload = {'message_id': 1, 'date': 0, 'chat': {'id': -100, 'type': 'supergroup'},
+               'from': {'id': 1, 'is_bot': False, 'first_name': 'Пользователь'}}
+    if photo is None:
+        payload['text'] = text
+    else:
+        payload['caption'] = text
+        payload['photo'] = [{'file_id': photo, 'file_unique_id': photo, 'width': 1, 'height': 1}]
+    if entities is not None:
+        payload['entities' if photo is None else 'caption_entities'] = entities
+    return MessageContext(Message.de_json(payload))
+
+
+def test_content_key_of_same_content():
+    assert context(TEXT).content_key == context(TEXT).content_key
+
+
+@pytest.mark.parametrize('other', [
+    context(TEXT + ' ' + '😀' * 9),
+    context(TEXT + '!' * 4000),
+    context(TEXT.upper()),
+    context(TEXT, [{'type': 'text_link', 'offset': 0, 'length': 6, 'url': 'https://example.com'}]),
+    context(TEXT, [{'type': 'bold', 'offset': 0, 'length': 6}]),
+    context(TEXT, photo='photo'),
+])
+def test_content_key_of_changed_content(other):
+    assert context(TEXT).content_key != other.content_key
@@ -0,0 +1,26 @@
+"""Tests of MinHash signatures and index."""
+from utils.premoderation.minhash import MinHashIndex, signature, similarity
+
+TEXT = 'Продам велосипед в отличном состоянии, недорого, доставка по городу, пишите в личку'
+OTHER = 'Сдам квартиру в центре на длительный срок, без животных, оплата ежемесячно, звоните'
+
+
+def test_short_text_has_no_signature():
+    assert signature('Продам велосипед') is None
+
+
+def test_signature_is_stable():
+    assert signature(TEXT) == signature(f'<b>{TEXT.upper()}</b>')
+    assert similarity(signature(TEXT), signature(TEXT)) == 1.0
+
+
+def test_similarity_of_different_texts():
+    assert similarity(signature(TEXT), signature(OTHER)) < 0.2
+
+
+def test_index_finds_near_duplicate():
+    index = MinHashIndex(window=60)
+    index.add(signature(TEXT), 'sender', now=1)
+    assert [entry[2] for entry in index.find(signature(TEXT + ' срочно'), now=2)] == ['sender']
+    assert not index.find(signature(OTHER), now=2)
+    assert not index.find(signature(TEXT), now=100)
@@ -0,0 +1,52 @@
+"""Tests of message text filter.
+
+`message_text_filter` must give the same result as its seven strippers
+applied in turn, as it was implemented before.
+"""
+import random
+
+import pytest
+
+from utils.helpers import (collapse_breaks, collapse_spaces, message_text_filter,
+                           strip_emails, strip_hashtags, strip_links, strip_mentions,
+                           strip_plain_links)
+
+STRIPPERS = (strip_links, strip_plain_links, strip_hashtags, strip_emails, strip_mentions,
+             collapse_breaks, collapse_spaces)
+CORPUS = 20_000
+TOKENS = (
+    'продам', 'велосипед', 'недорого,', 'Цена:', '100₽', '<b>торг</b>', '<i>срочно</i>',
+    '<span class="tg-spoiler">скидка</span>', '&lt;3', '&amp;', '#велосипед', '#авто#дом',
+    '@username', 'mail@example.com', 'a@b.c@d.ru', '#a@b.ru', 'x#y@z.com', '@@', '##', '::',
+    'https://t.me/chat', 'HTTP://EXAMPLE.COM/?q=1#top', 'http:/broken',
+    '<a href="https://example.com">ссылка</a>', '<a href="tg://user?id=1">', '</a>', '<a',
+    '</a', 'a>', '<', '>', '<abbr>', 'x<a href="y">z</a>#t', '<b>https://example.com</b>',
+    '<code>@decorator</code>')
+SEPARATORS = ('', ' ', ' ', ' ', '  ', '\n', '\n\n', '\n\n\n', ' \n  ', '\t', '\xa0')
+
+
+def reference(html_text: str) -> str:
+    """Apply strippers in turn."""
+    for stripper in STRIPPERS:
+        html_text = stripper(html_text)
+    return html_text.strip()
+
+
+@pytest.mark.parametrize('html_text', [
+    '',
+    'Продам велосипед недорого',
+    '<b>Продам</b> велосипед #велосипед @username',
+    'Пишите на mail@example.com или https://t.me/chat  \n\n\n\nЦена: 100₽',
+    '<a href="https://example.com">ссылка</a> и <abbr>текст</abbr>',
+    'первая строка\n\n\n\n  вторая   строка #тег\nтретья  строка',
+])
+def test_examples(html_text):
+    assert message_text_filter(html_text) == reference(html_text)
+
+
+def test_random_corpus():
+    rnd = random.Random(0)
+    for _ in range(CORPUS):
+        html_text = ''.join(rnd.choice(TOKENS) + rnd.choice(SEPARATORS)
+                            for _ in range(rnd.randint(1, 60)))
+        assert message_text_filter(html_text) == reference(html_text), repr(html_text)
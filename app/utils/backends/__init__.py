@@ -0,0 +1,53 @@
+"""Storage backends module.
+
+Backend of each database is chosen in the `Database` section of config
+by `<NAME>_BACKEND` option: `memory`, `tinydb` or `sqlite`. Its file may be
+set by `<NAME>_PATH` option.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Mapping
+
+from utils.config import config
+
+from .base import Backend, Document
+from .memory import MemoryBackend
+from .sqlite import SqliteBackend
+from .tiny import TinyDBBackend, write_behind_storage
+
+BACKENDS = {
+    'memory': MemoryBackend,
+    'tinydb': TinyDBBackend,
+    'sqlite': SqliteBackend,
+}
+
+# Options of older configs, which are still read, if new ones are not set
+LEGACY_OPTIONS = {
+    'PENDING_POSTS_BACKEND': 'PENDING_BACKEND',
+    'PENDING_POSTS_PATH': 'PENDING_SQLITE_PATH',
+}
+
+
+def get_option(option: str, default: str | None = None) -> str | None:
+    """Get option of `Database` section of config, falling back to its legacy name."""
+    fallback = config.get('Database', LEGACY_OPTIONS.get(option, option), fallback=default)
+    return config.get('Database', option, fallback=fallback)
+
+
+def get_backend(name: str, indexes: Iterable[str] | Mapping[str, str] = (),
+                kind: str | None = None, default: str = 'tinydb', **kwargs) -> Backend:
+    """Create backend of database.
+
+    Args:
+        `name (str)`: Database name.
+        `indexes (Iterable[str] | Mapping[str, str])`: Indexed fields.
+        `kind (str | None)`: Backend kind, taken from config if not set.
+        `default (str)`: Backend kind, if it is not set in config.
+
+    Returns:
+        `Backend`: Backend instance.
+    """
+    kind = kind or get_option(f'{name.upper()}_BACKEND', default)
+    if 'file' not in kwargs:
+        kwargs['file'] = get_option(f'{name.upper()}_PATH')
+    return BACKENDS[kind](name, indexes, **kwargs)
@@ -0,0 +1,146 @@
+"""Storage backends base module."""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Mapping
+
+
+class Document(dict):
+    """Document with id."""
+
+    def __init__(self, value: Mapping, doc_id: int):
+        super().__init__(value)
+        self.doc_id = doc_id
+
+
+def get_field(document: Dict, path: str):
+    """Get value of document field by dotted path, e.g. `sender.chat_id`."""
+    value = document
+    for key in path.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+class Backend(ABC):
+    """Base class of storage backends.
+
+    Documents are dicts, fields are addressed by dotted paths or index names and
+    compared by equality. Lookups by declared indexes don't depend on the number
+    of documents, lookups by other fields scan the documents.
+
+    Args:
+        `name (str)`: Database name, used as file and table name.
+        `indexes (Iterable[str] | Mapping[str, str])`: Paths of indexed fields
+            or mapping of index names to paths.
+        `path (str | Path)`: Directory of database files.
+        `file (str | Path | None)`: Database file, `<path>/<name>.<suffix>` if not set.
+    """
+
+    def __init__(self, name: str, indexes: Iterable[str] | Mapping[str, str] = (),
+                 path: str | Path = 'db', file: str | Path | None = None):
+        self.name = name
+        if not isinstance(indexes, Mapping):
+            indexes = {field.replace('.', '_'): field for field in indexes}
+        self.indexes: Dict[str, str] = dict(indexes)
+        self.path = Path(path)
+        self.file = None if file is None else Path(file)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of documents."""
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__} {self.name}'
+
+    def filename(self, suffix: str) -> Path:
+        """Get database file, its parent directory is created."""
+        file = self.file or self.path / f'{self.name}{suffix}'
+        file.parent.mkdir(parents=True, exist_ok=True)
+        return file
+
+    def resolve(self, fields: Mapping) -> Dict:
+        """Replace index names in query fields by fields paths."""
+        return {self.indexes.get(field, field): value for field, value in fields.items()}
+
+    @abstractmethod
+    def insert(self, document: Dict) -> int:
+        """Insert document.
+
+        Returns:
+            `int`: Id of document.
+        """
+
+    def insert_many(self, documents: Iterable[Dict]) -> List[int]:
+        """Insert documents.
+
+        Returns:
+            `List[int]`: Ids of documents.
+        """
+        with self.batch():
+            return [self.insert(document) for document in documents]
+
+    @abstractmethod
+    def search(self, **fields) -> List[Document]:
+        """Get documents, which fields are equal to given, ordered by id."""
+
+    def get(self, **fields) -> Document | None:
+        """Get the first document, which fields are equal to given."""
+        documents = self.search(**fields)
+        return documents[0] if documents else None
+
+    def all(self) -> List[Document]:
+        """Get all documents."""
+        return self.search()
+
+    def contains(self, **fields) -> bool:
+        """Check if there is document, which fields are equal to given."""
+        return self.get(**fields) is not None
+
+    @abstractmethod
+    def update(self, changes: Dict, **fields) -> List[int]:
+        """Update documents, which fields are equal to given.
+
+        Returns:
+            `List[int]`: Ids of updated documents.
+        """
+
+    def upsert(self, document: Dict, **fields) -> List[int]:
+        """Update documents, which fields are equal to given, or insert document.
+
+        Returns:
+            `List[int]`: Ids of updated or inserted documents.
+        """
+        return self.update(document, **fields) or [self.insert(document)]
+
+    @abstractmethod
+    def remove(self, **fields) -> List[int]:
+        """Remove documents, which fields are equal to given.
+
+        Returns:
+            `List[int]`: Ids of removed documents.
+        """
+
+    @abstractmethod
+    def truncate(self) -> None:
+        """Remove all documents."""
+
+    @contextmanager
+    def batch(self) -> Iterator[Backend]:
+        """Group changes, so backend can save them at once."""
+        yield self
+
+    def flush(self) -> None:
+        """Write all changes to disk."""
+
+    def refresh(self) -> bool:
+        """Pick up changes made by another process, e.g. `commands.py`.
+
+        Returns:
+            `bool`: Could documents be changed since the previous call.
+        """
+        return False
@@ -0,0 +1,82 @@
+"""In-memory storage backend module."""
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set
+
+from .base import Backend, Document, get_field
+
+
+class MemoryBackend(Backend):
+    """In-memory backend with hash indexes.
+
+    Documents are lost on restart.
+    """
+
+    def __init__(self, name: str, indexes: Iterable[str] = (), **kwargs):
+        super().__init__(name, indexes, **kwargs)
+        self.documents: Dict[int, Dict] = {}
+        self.index: Dict[str, Dict[object, Set[int]]] = {
+            path: defaultdict(set) for path in self.indexes.values()}
+        self.last_id = 0
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def insert(self, document: Dict) -> int:
+        self.last_id += 1
+        self.documents[self.last_id] = dict(document)
+        self._index(self.last_id)
+        return self.last_id
+
+    def search(self, **fields) -> List[Document]:
+        return [Document(self.documents[doc_id], doc_id)
+                for doc_id in self._find(self.resolve(fields))]
+
+    def update(self, changes: Dict, **fields) -> List[int]:
+        doc_ids = self._find(self.resolve(fields))
+        for doc_id in doc_ids:
+            self._unindex(doc_id)
+            self.documents[doc_id].update(changes)
+            self._index(doc_id)
+        return doc_ids
+
+    def remove(self, **fields) -> List[int]:
+        doc_ids = self._find(self.resolve(fields))
+        for doc_id in doc_ids:
+            self._unindex(doc_id)
+            del self.documents[doc_id]
+        return doc_ids
+
+    def truncate(self) -> None:
+        self.documents.clear()
+        for index in self.index.values():
+            index.clear()
+
+    def _find(self, fields: Dict) -> List[int]:
+        """Find ids of documents, use the most selective index."""
+        buckets = [self.index[path].get(value, ()) for path, value in fields.items()
+                   if path in self.index]
+        if buckets:
+            candidates = sorted(min(buckets, key=len))
+        else:
+            candidates = self.documents
+        return [doc_id for doc_id in candidates
+                if all(get_field(self.documents[doc_id], path) == value
+                       for path, value in fields.items())]
+
+    def _index(self, doc_id: int) -> None:
+        """Add document to indexes."""
+        document = self.documents[doc_id]
+        for path, index in self.index.items():
+            index[get_field(document, path)].add(doc_id)
+
+    def _unindex(self, doc_id: int) -> None:
+        """Remove document from indexes."""
+        document = self.documents[doc_id]
+        for path, index in self.index.items():
+            value = get_field(document, path)
+            bucket = index[value]
+            bucket.discard(doc_id)
+            if not bucket:
+                del index[value]
@@ -0,0 +1,156 @@
+"""SQLite storage backend module."""
+from __future__ import annotations
+
+import json
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from utils.storages import WriteBehind
+
+from .base import Backend, Document, get_field
+
+
+class SqliteBackend(WriteBehind, Backend):
+    """SQLite backend.
+
+    Database works in WAL mode. Indexed fields are stored in indexed columns
+    named after indexes, the whole document is stored as JSON. Lookups by other
+    fields use `json_extract`. Statements are built once per query shape and
+    are served from the sqlite3 prepared statements cache.
+
+    Changes are committed in batches: after `batch_size` changes or in
+    `commit_interval` seconds after the first uncommitted change. Reads use
+    the same connection, so uncommitted changes are visible immediately.
+    """
+
+    def __init__(self, name: str, indexes: Iterable[str] = (),
+                 batch_size: int = 50, commit_interval: float = 1.0, **kwargs):
+        Backend.__init__(self, name, indexes, **kwargs)
+        WriteBehind.__init__(self, interval=commit_interval, threshold=batch_size)
+        self.columns: Dict[str, str] = {path: column for column, path in self.indexes.items()}
+        self.batch_depth = 0
+        self._statements: Dict[Tuple, str] = {}
+
+        self.connection = sqlite3.connect(self.filename('.sqlite3'), cached_statements=128)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        columns = ''.join(f'{column}, ' for column in self.indexes)
+        self.connection.execute(
+            f'CREATE TABLE IF NOT EXISTS {name} '
+            f'(doc_id INTEGER PRIMARY KEY AUTOINCREMENT, {columns}document TEXT NOT NULL)')
+        for column in self.indexes:
+            self.connection.execute(
+                f'CREATE INDEX IF NOT EXISTS {name}_{column} ON {name} ({column})')
+        self.connection.commit()
+        self.data_version = self._data_version()
+
+    def __len__(self) -> int:
+        return self.connection.execute(f'SELECT COUNT(*) FROM {self.name}').fetchone()[0]
+
+    def insert(self, document: Dict) -> int:
+        cursor = self.connection.execute(self._statement('insert'), self._row(document))
+        self.changed()
+        return cursor.lastrowid
+
+    def search(self, **fields) -> List[Document]:
+        return [Document(json.loads(document), doc_id)
+                for doc_id, document in self._select(fields)]
+
+    def update(self, changes: Dict, **fields) -> List[int]:
+        rows = self._select(fields)
+        if not rows:
+            return []
+        self.connection.executemany(self._statement('update'), [
+            (*self._row({**json.loads(document), **changes}), doc_id)
+            for doc_id, document in rows
+        ])
+        self.changed()
+        return [doc_id for doc_id, _ in rows]
+
+    def remove(self, **fields) -> List[int]:
+        doc_ids = [doc_id for doc_id, _ in self._select(fields)]
+        if not doc_ids:
+            return []
+        self.connection.executemany(self._statement('delete'), [(doc_id,) for doc_id in doc_ids])
+        self.changed()
+        return doc_ids
+
+    def truncate(self) -> None:
+        self.connection.execute(f'DELETE FROM {self.name}')
+        self.changed()
+
+    @contextmanager
+    def batch(self) -> Iterator[SqliteBackend]:
+        """Commit all changes made inside at once."""
+        self.batch_depth += 1
+        try:
+            yield self
+        finally:
+            self.batch_depth -= 1
+            if not self.batch_depth:
+                self.flush()
+
+    def changed(self) -> None:
+        if self.batch_depth:
+            self.dirty += 1
+            return
+        super().changed()
+
+    def persist(self, wait: bool) -> None:
+        self.connection.commit()
+
+    def refresh(self) -> bool:
+        data_version = self._data_version()
+        if data_version == self.data_version:
+            return False
+        self.data_version = data_version
+        return True
+
+    def _data_version(self) -> int:
+        """Get version of database, which changes on commits of other connections."""
+        return self.connection.execute('PRAGMA data_version').fetchone()[0]
+
+    def _select(self, fields: Dict) -> List[Tuple[int, str]]:
+        """Select ids and documents by fields."""
+        fields = self.resolve(fields)
+        return self.connection.execute(
+            self._statement('select', tuple(fields)), tuple(fields.values())).fetchall()
+
+    def _statement(self, kind: str, paths: Tuple[str, ...] = ()) -> str:
+        """Get SQL statement, build it on the first call."""
+        key = (kind, paths)
+        if key not in self._statements:
+            self._statements[key] = self._build_statement(kind, paths)
+        return self._statements[key]
+
+    def _build_statement(self, kind: str, paths: Tuple[str, ...]) -> str:
+        """Build SQL statement."""
+        columns = [*self.indexes, 'document']
+        match kind:
+            case 'insert':
+                return f'INSERT INTO {self.name} ({", ".join(columns)}) ' \
+                    f'VALUES ({", ".join("?" * len(columns))})'
+            case 'update':
+                assignments = ', '.join(f'{column} = ?' for column in columns)
+                return f'UPDATE {self.name} SET {assignments} WHERE doc_id = ?'
+            case 'delete':
+                return f'DELETE FROM {self.name} WHERE doc_id = ?'
+            case 'select':
+                # Only the first indexed field is searched by index, unary plus
+                # keeps planner from picking less selective indexes of the others
+                conditions, indexed = [], False
+                for path in paths:
+                    if path not in self.columns:
+                        conditions.append(f"json_extract(document, '$.{path}') = ?")
+                        continue
+                    conditions.append(f'{"+" if indexed else ""}{self.columns[path]} = ?')
+                    indexed = True
+                where = f' WHERE {" AND ".join(conditions)}' if conditions else ''
+                return f'SELECT doc_id, document FROM {self.name}{where} ORDER BY doc_id'
+        raise ValueError(f'Unknown statement: {kind}')
+
+    def _row(self, document: Dict) -> tuple:
+        """Get column values of document."""
+        return (*(get_field(document, path) for path in self.indexes.values()),
+                json.dumps(document, ensure_ascii=False))
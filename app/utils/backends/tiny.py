@@ -0,0 +1,103 @@
+"""TinyDB JSON storage backend module."""
+from __future__ import annotations
+
+from functools import reduce
+from operator import and_
+from typing import Dict, Iterable, List
+
+from tinydb import Query, TinyDB
+
+from utils.config import config
+from utils.storages import AtomicJSONStorage, WriteBehindMiddleware
+
+from .base import Backend, Document
+
+
+def write_behind_storage() -> WriteBehindMiddleware:
+    """Get TinyDB storage, which writes changes to disk in background.
+
+    Flush interval and threshold of changes are taken from config.
+
+    Returns:
+        `WriteBehindMiddleware`: Storage for `TinyDB(storage=...)`.
+    """
+    return WriteBehindMiddleware(
+        AtomicJSONStorage,
+        interval=config.getfloat('Database', 'WRITE_BEHIND_INTERVAL', fallback=5.0),
+        threshold=config.getint('Database', 'WRITE_BEHIND_THRESHOLD', fallback=100))
+
+
+class TinyDBBackend(Backend):
+    """TinyDB JSON file backend.
+
+    Table is cached in memory by write-behind storage, but TinyDB has no indexes,
+    so every lookup scans the table. Caches of TinyDB table are dropped, when
+    storage reloads the file changed by another process.
+    """
+
+    def __init__(self, name: str, indexes: Iterable[str] = (), **kwargs):
+        super().__init__(name, indexes, **kwargs)
+        self.storage = write_behind_storage()
+        self.db = TinyDB(self.filename('.json'), encoding='utf8', storage=self.storage)
+        self.version = self.storage.version
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self.db)
+
+    def insert(self, document: Dict) -> int:
+        self.refresh()
+        return self.db.insert(dict(document))
+
+    def insert_many(self, documents: Iterable[Dict]) -> List[int]:
+        self.refresh()
+        return self.db.insert_multiple(dict(document) for document in documents)
+
+    def search(self, **fields) -> List[Document]:
+        self.refresh()
+        if not fields:
+            documents = self.db.all()
+        else:
+            documents = self.db.search(self._condition(fields))
+        return [Document(document, document.doc_id) for document in documents]
+
+    def update(self, changes: Dict, **fields) -> List[int]:
+        self.refresh()
+        if not fields:
+            return self.db.update(changes)
+        return self.db.update(changes, self._condition(fields))
+
+    def remove(self, **fields) -> List[int]:
+        self.refresh()
+        if not fields:
+            doc_ids = [document.doc_id for document in self.db.all()]
+            self.db.truncate()
+            return doc_ids
+        return self.db.remove(self._condition(fields))
+
+    def truncate(self) -> None:
+        self.db.truncate()
+
+    def flush(self) -> None:
+        self.storage.flush(wait=True)
+
+    def refresh(self) -> bool:
+        self.storage.refresh()
+        if self.version == self.storage.version:
+            return False
+        self.version = self.storage.version
+        # Query cache and next id of table are stale after reload
+        table = self.db.table(self.db.default_table_name)
+        table.clear_cache()
+        table._next_id = None  # pylint: disable=protected-access
+        return True
+
+    def _condition(self, fields: Dict):
+        """Make TinyDB query from fields."""
+        conditions = []
+        for path, value in self.resolve(fields).items():
+            query = Query()
+            for key in path.split('.'):
+                query = query[key]
+            conditions.append(query == value)
+        return reduce(and_, conditions)
@@ -1,27 +1,43 @@
 """Модуль предназначенный для работы с базой данных"""
+from __future__ import annotations
+
+from collections import OrderedDict
+import dataclasses
 from datetime import datetime, timedelta
+import heapq
+from operator import itemgetter
 from pathlib import Path
 import re
-from typing import Dict, List, Union
-
-from tinydb import Query, TinyDB, where
-from tinydb.storages import MemoryStorage
+from time import monotonic
+from typing import Any, Dict, Iterable, List, Tuple, Union
 
+from utils.backends import get_backend
 from utils.helpers import Singletone
 from utils.logger import log
-
-admin = Query()
-memory = TinyDB(storage=MemoryStorage)
+from utils.storages import Snapshot
 
 # Create db directory and database files if not exists
 Path("db").mkdir(parents=True, exist_ok=True)
 
+# Admins database is checked for changes of another process at most once per
+# ADMINS_REFRESH_INTERVAL seconds
+ADMINS_REFRESH_INTERVAL = 5.0
+
 
 class AdminDatabase(metaclass=Singletone):
-    """Класс представляюший объект базы администраторов."""
+    """Класс представляюший объект базы администраторов.
+
+    Администраторы кешируются в памяти (словарь id -> документ и frozenset id),
+    кеш сбрасывается при каждом изменении базы. Изменения другого процесса
+    (`commands.py`) проверяются не чаще раза в `ADMINS_REFRESH_INTERVAL`
+    секунд, поэтому проверка прав не обращается к диску.
+    """
 
     def __init__(self, **kwargs):
-        self.__db = TinyDB(kwargs.pop('db', 'db/admins.json'), encoding='utf8')
+        self.__db = get_backend('admins', indexes=('id',), **kwargs)
+        self.__by_id: Dict[int, Dict] | None = None
+        self.__ids: frozenset | None = None
+        self.__checked = monotonic()
 
     @property
     def admins(self) -> List[Dict]:
@@ -30,8 +46,20 @@ class AdminDatabase(metaclass=Singletone):
         Returns:
             List[Dict]: Список документов администраторов.
         """
-        log.info('Вызван список администраторов!')
-        return self.__db.all()
+        log.debug('Вызван список администраторов!')
+        return list(self.__cached().values())
+
+    @property
+    def ids(self) -> frozenset:
+        """Поле представляющее множество ID администраторов.
+
+        Returns:
+            `frozenset`: ID администраторов.
+        """
+        by_id = self.__cached()
+        if self.__ids is None:
+            self.__ids = frozenset(by_id)
+        return self.__ids
 
     @admins.setter
     def admins(self, value: Dict):
@@ -46,6 +74,7 @@ class AdminDatabase(metaclass=Singletone):
             'fullname': fullname,
             'sign': sign
         })
+        self.__invalidate()
         log.info('Запись администратора успешно добавлена! Id: %s.', str(_))
 
     def update(self, admin_id: int, query: Dict):
@@ -55,16 +84,18 @@ class AdminDatabase(metaclass=Singletone):
             `admin_id (int)`: ID администратора.
             `query (Dict)`: Запись изменений.
         """
-        self.__db.update(query, admin.id == admin_id)
+        self.__db.update(query, id=admin_id)
+        self.__invalidate()
 
     def remove_admin(self, **kwargs):
         """Метод позволяющий удалять администраторов из базы."""
         if kwargs.get('username'):
-            _ = self.__db.remove(admin.username == kwargs.get('username'))
+            _ = self.__db.remove(username=kwargs.get('username'))
         elif kwargs.get('fullname'):
-            _ = self.__db.remove(admin.fullname == kwargs.get('fullname'))
+            _ = self.__db.remove(fullname=kwargs.get('fullname'))
         elif kwargs.get('id'):
-            _ = self.__db.remove(admin.id == int(kwargs.get('id')))
+            _ = self.__db.remove(id=int(kwargs.get('id')))
+        self.__invalidate()
         log.info('Администратор удален! Id: %s.', str(_))
 
     def get_admin_by_id(self, admin_id: int) -> Dict:
@@ -76,24 +107,46 @@ class AdminDatabase(metaclass=Singletone):
         Returns:
             Dict: Документ администратора.
         """
-        return self.__db.get(admin.id == admin_id)
+        return self.__cached().get(admin_id)
+
+    def __cached(self) -> Dict[int, Dict]:
+        """Get admins by id map, read it from database if cache is empty or stale."""
+        if monotonic() - self.__checked > ADMINS_REFRESH_INTERVAL:
+            self.__checked = monotonic()
+            if self.__db.refresh():
+                self.__invalidate()
+        if self.__by_id is None:
+            self.__by_id = {document['id']: dict(document) for document in self.__db.all()}
+        return self.__by_id
+
+    def __invalidate(self):
+        """Reset admins cache."""
+        self.__by_id = None
+        self.__ids = None
 
 
 class TagDatabase(metaclass=Singletone):
-    """Класс представляюший объект базы тегов."""
+    """Класс представляюший объект базы тегов.
+
+    Отсортированный список тегов кешируется, `version` увеличивается при каждом
+    изменении базы и может использоваться как ключ производных кешей.
+    """
 
     def __init__(self, **kwargs):
-        self.__db = TinyDB(kwargs.pop('db', 'db/tags.json'), encoding='utf8')
-        self.Tag = Query()
+        self.__db = get_backend('tags', indexes=('tag',), **kwargs)
+        self.version = 0
+        self.__tags: Tuple[str, ...] | None = None
 
     @property
-    def tags(self) -> List[Dict]:
-        """Поле представляющее список тегов.
+    def tags(self) -> Tuple[str, ...]:
+        """Поле представляющее отсортированный список тегов.
 
         Returns:
-            `List[str]`: Список документов тегов.
+            `Tuple[str, ...]`: Теги.
         """
-        return self.all(unpack=True)
+        if self.__tags is None:
+            self.__tags = tuple(self.all(unpack=True))
+        return self.__tags
 
     def all(self, sort=True, unpack=False) -> Union[List[str], List[dict]]:
         """Returns list of all tags.
@@ -121,11 +174,12 @@ class TagDatabase(metaclass=Singletone):
         if tag == '#':
             return False
 
-        if not self.__db.contains(where('tag') == tag):
+        if (document := self.__db.get(tag=tag)) is None:
             _ = self.__db.insert({'tag': tag})
+            self.__changed()
             log.info('Запись тега успешно добавлена! Id: %s.', str(_))
             return _
-        return self.__db.get(where('tag') == tag).doc_id
+        return document.doc_id
 
     @tags.setter
     def tags(self, value: str):
@@ -135,9 +189,16 @@ class TagDatabase(metaclass=Singletone):
     def remove(self, value: str):
         """Метод позволяющий удалять теги из базы."""
         tag = self._prepare_tag(value)
-        _ = self.__db.remove(where('tag') == tag)
+        _ = self.__db.remove(tag=tag)
+        if _:
+            self.__changed()
         log.info('Тег удален! Id: %s.', str(_))
 
+    def __changed(self):
+        """Reset tags cache and increase version."""
+        self.__tags = None
+        self.version += 1
+
     @staticmethod
     def _prepare_tag(tag: str) -> str:
         """Prepare tag for search."""
@@ -146,31 +207,88 @@ class TagDatabase(metaclass=Singletone):
 
 
 class MessagesToPreventDeletingDB(metaclass=Singletone):
-    """Class, that represents database of messages to prevent deleting."""
+    """Class, that represents set of messages to prevent deleting.
+
+    Messages are kept in memory for `ttl` seconds, at most `max_size` of them,
+    the oldest are dropped first. The set is periodically saved to snapshot file.
+    """
 
     def __init__(self, **kwargs):
         db_path = kwargs.pop('db', 'db/messages_to_prevent_deleting.json')
-        self.db = TinyDB(db_path, encoding='utf8')
+        self.ttl = kwargs.pop('ttl', timedelta(days=1).total_seconds())
+        self.max_size = kwargs.pop('max_size', 10_000)
+        self.__expires: OrderedDict[int, float] = OrderedDict()
+        self.snapshot = Snapshot(db_path, lambda: list(self.__expires.items()),
+                                 interval=kwargs.pop('snapshot_interval', 60))
+
+        # Snapshot of the former TinyDB database is a dict and is skipped
+        snapshot = self.snapshot.load([])
+        if isinstance(snapshot, list):
+            self.__expires.update(sorted(snapshot, key=itemgetter(1)))
+        self.__purge()
 
     def add(self, message_id: int):
-        """Method that adds message to database."""
-        self.db.insert({'message_id': message_id})
+        """Method that adds message to the set."""
+        self.__expires.pop(message_id, None)
+        self.__expires[message_id] = datetime.now().timestamp() + self.ttl
+        self.__purge()
+        self.snapshot.changed()
 
     def remove(self, message_id: int):
-        """Method that removes message from database."""
-        self.db.remove(where('message_id') == message_id)
+        """Method that removes message from the set."""
+        self.pop(message_id)
+
+    def pop(self, message_id: int) -> bool:
+        """Method that removes message from the set.
+
+        Returns:
+            `bool`: Was message in the set.
+        """
+        if self.__expires.pop(message_id, None) is None:
+            return False
+        self.snapshot.changed()
+        return True
 
     def has(self, message_id: int) -> bool:
-        """Method that checks if message is in database."""
-        return self.db.contains(where('message_id') == message_id)
+        """Method that checks if message is in the set."""
+        self.__purge()
+        return message_id in self.__expires
+
+    def __purge(self):
+        """Drop expired and exceeding max size messages."""
+        now = datetime.now().timestamp()
+        purged = 0
+        while self.__expires:
+            message_id, expires = next(iter(self.__expires.items()))
+            if expires > now and len(self.__expires) <= self.max_size:
+                break
+            del self.__expires[message_id]
+            purged += 1
+        if purged:
+            self.snapshot.changed()
 
 
 class BannedSenders(metaclass=Singletone):
-    """Class, that represents database of banned senders."""
+    """Class, that represents database of banned senders.
+
+    Bans are kept in memory as sender_id -> expiration timestamp map, so checks
+    are O(1). Expirations are also kept in min-heap, expired bans are purged
+    from memory and database by `compact`, which runs as soon as the earliest
+    ban expires.
+    """
 
     def __init__(self, **kwargs):
-        db_path = kwargs.pop('db', 'db/banned_senders.json')
-        self.db = TinyDB(db_path, encoding='utf8')
+        self.default_days = kwargs.pop('days', 7)
+        self.db = get_backend('banned_senders', indexes=('sender_id',), **kwargs)
+        self.__expires: Dict[str, float] = {}
+        self.__heap: List[Tuple[float, str]] = []
+
+        for document in self.db.all():
+            # Records without expiration were created with fixed ban period
+            expires = document.get('expires') \
+                or document['date'] + timedelta(days=self.default_days).total_seconds()
+            self.__ban(document['sender_id'], expires)
+        self.compact()
 
     @staticmethod
     def now(add_days: int = 0, subtract_days: int = 0) -> str:
@@ -182,49 +300,208 @@ class BannedSenders(metaclass=Singletone):
             now -= timedelta(days=subtract_days)
         return now.timestamp()
 
-    def add(self, sender_id: int):
-        """Method that adds user to database."""
-        self.remove(sender_id)
-        self.db.insert({'sender_id': sender_id, 'date': self.now()})
+    def add(self, sender_id: str, days: int | None = None):
+        """Method that adds user to database.
 
-    def remove(self, sender_id: int):
+        Args:
+            `sender_id (str)`: Sender chat id.
+            `days (int | None)`: Ban period, `default_days` if not set.
+        """
+        expires = self.now(add_days=days or self.default_days)
+        self.db.upsert({'sender_id': sender_id, 'date': self.now(), 'expires': expires},
+                       sender_id=sender_id)
+        self.__ban(sender_id, expires)
+
+    def remove(self, sender_id: str):
         """Method that removes user from database."""
-        self.db.remove(where('sender_id') == sender_id)
+        if self.__expires.pop(sender_id, None) is not None:
+            self.db.remove(sender_id=sender_id)
 
-    def has(self, sender_id: int, days_period=7) -> bool:
-        """Method that checks if user is in database."""
-        selector = (where('sender_id') == sender_id) \
-            & (where('date') > self.now(subtract_days=days_period))
-        return self.db.contains(selector)
+    def has(self, sender_id: str) -> bool:
+        """Method that checks if user is banned."""
+        now = self.now()
+        if self.__heap and self.__heap[0][0] <= now:
+            self.compact()
+        return self.__expires.get(sender_id, 0) > now
 
+    def compact(self) -> int:
+        """Method that removes expired bans.
 
-class CalledPublicCommands(metaclass=Singletone):
-    """Class, that represents database of called public commands."""
+        Returns:
+            `int`: Number of removed bans.
+        """
+        now = self.now()
+        expired = []
+        while self.__heap and self.__heap[0][0] <= now:
+            expires, sender_id = heapq.heappop(self.__heap)
+            # Heap entry is stale, if ban was prolonged or removed
+            if self.__expires.get(sender_id) == expires:
+                del self.__expires[sender_id]
+                expired.append(sender_id)
+        if expired:
+            with self.db.batch():
+                for sender_id in expired:
+                    self.db.remove(sender_id=sender_id)
+            log.info('Expired bans removed: %s', len(expired))
+        return len(expired)
+
+    def __ban(self, sender_id: str, expires: float):
+        """Add ban to memory indexes."""
+        self.__expires[sender_id] = expires
+        heapq.heappush(self.__heap, (expires, sender_id))
+
+
+# Fields are columns of the stored document of post, not state to split into classes
+@dataclasses.dataclass(slots=True)
+class PendingPost:  # pylint: disable=too-many-instance-attributes
+    """Класс представляющий пост, ожидающий модерации.
+
+    Хранит только поля, которые используются при модерации, вместо полного
+    JSON сообщения Telegram, поэтому копия поста у каждого администратора
+    занимает в разы меньше памяти.
+    """
+    msg_id: int
+    admin_id: int
+    message_id: int
+    chat_id: int
+    content_type: str
+    file_id: str | None
+    html_text: str
+    sender: Dict[str, Any]
+    tags: List[str] | None = None
+    sign: str | None = None
+    content_key: str | None = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Метод возвращающий документ поста для хранилища."""
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_dict(cls, document: Dict[str, Any]) -> PendingPost:
+        """Метод создающий пост из документа хранилища."""
+        return cls(**{field.name: document.get(field.name) for field in dataclasses.fields(cls)})
+
+
+class PendingPosts(metaclass=Singletone):
+    """Класс представляющий хранилище постов, ожидающих модерации.
+
+    Посты ищутся по `msg_id` сообщения у администратора и id его чата через
+    индексы, также проиндексированы `message_id` исходного сообщения группы
+    и `chat_id` отправителя. По умолчанию хранилище использует SQLite, поэтому
+    посты переживают перезапуск бота.
+    """
+
+    indexes = {
+        'msg_id': 'msg_id',
+        'admin_id': 'admin_id',
+        'message_id': 'message_id',
+        'sender_id': 'sender.chat_id',
+    }
 
     def __init__(self, **kwargs):
-        db_path = kwargs.pop('db', 'db/called_public_commands.json')
-        self.db = TinyDB(db_path, encoding='utf8')
+        self.__db = get_backend('pending_posts', self.indexes, default='sqlite', **kwargs)
 
-    def add(self, command: str, **extra_data):
-        """Method that adds command to database."""
-        now = datetime.now().timestamp()
-        command_data = {'last_called': now, **extra_data}
+    def __len__(self) -> int:
+        return len(self.__db)
+
+    def truncate(self):
+        """Метод позволяющий удалить все посты из хранилища."""
+        self.__db.truncate()
+
+    def insert(self, post: PendingPost) -> int:
+        """Метод позволяющий добавить пост в хранилище.
+
+        Args:
+            `post (PendingPost)`: Пост.
+
+        Returns:
+            `int`: Id документа.
+        """
+        return self.__db.insert(post.to_dict())
+
+    def insert_many(self, posts: Iterable[PendingPost]) -> List[int]:
+        """Метод позволяющий добавить несколько постов в хранилище.
+
+        Args:
+            `posts (Iterable[PendingPost])`: Посты.
+
+        Returns:
+            `List[int]`: Id документов.
+        """
+        return self.__db.insert_many(post.to_dict() for post in posts)
+
+    def get(self, msg_id: int, admin_id: int | None = None) -> PendingPost | None:
+        """Метод позволяющий получить пост по id сообщения у администратора.
+
+        Args:
+            `msg_id (int)`: Id сообщения в чате администратора.
+            `admin_id (int | None)`: Id чата администратора.
 
-        if self.db.contains(where('command') == command):
-            self.db.update(command_data, where('command') == command)
-            return
+        Returns:
+            `PendingPost | None`: Пост.
+        """
+        document = self.__db.get(**self.__where(msg_id, admin_id))
+        return None if document is None else PendingPost.from_dict(document)
 
-        command_data['command'] = command
-        self.db.insert(command_data)
+    def search(self, field: str, value) -> List[PendingPost]:
+        """Метод позволяющий найти посты по индексированному полю.
 
-    def called(self, command: str, **extra_data) -> bool:
-        """Alias for add()."""
-        return self.add(command, **extra_data)
+        Args:
+            `field (str)`: Имя индекса (`msg_id`, `admin_id`, `message_id`, `sender_id`).
+            `value`: Значение поля.
 
-    def get(self, command: str) -> Dict:
-        """Method that gets command from database."""
-        return self.db.get(where('command') == command)
+        Returns:
+            `List[PendingPost]`: Найденные посты.
+        """
+        return [PendingPost.from_dict(document) for document in self.__db.search(**{field: value})]
+
+    def update(self, fields: Dict, msg_id: int, admin_id: int | None = None) -> List[int]:
+        """Метод позволяющий обновить пост.
+
+        Args:
+            `fields (Dict)`: Запись изменений.
+            `msg_id (int)`: Id сообщения в чате администратора.
+            `admin_id (int | None)`: Id чата администратора.
 
-    def exists(self, command: str) -> bool:
-        """Method that checks if command is in database."""
-        return self.db.contains(where('command') == command)
+        Returns:
+            `List[int]`: Id обновленных документов.
+        """
+        return self.__db.update(fields, **self.__where(msg_id, admin_id))
+
+    def remove(self, msg_id: int, admin_id: int | None = None) -> List[int]:
+        """Метод позволяющий удалить пост из хранилища.
+
+        Args:
+            `msg_id (int)`: Id сообщения в чате администратора.
+            `admin_id (int | None)`: Id чата администратора.
+
+        Returns:
+            `List[int]`: Id удаленных документов.
+        """
+        return self.__db.remove(**self.__where(msg_id, admin_id))
+
+    def remove_copies(self, msg_id: int, admin_id: int | None = None) -> List[int]:
+        """Метод позволяющий удалить пост из хранилища вместе с его копиями у
+        остальных администраторов.
+
+        Копии одного поста находятся по `message_id` и `chat_id` исходного
+        сообщения группы.
+
+        Args:
+            `msg_id (int)`: Id сообщения в чате администратора.
+            `admin_id (int | None)`: Id чата администратора.
+
+        Returns:
+            `List[int]`: Id удаленных документов.
+        """
+        post = self.get(msg_id, admin_id)
+        if post is None:
+            return []
+        return self.__db.remove(message_id=post.message_id, chat_id=post.chat_id)
+
+    @staticmethod
+    def __where(msg_id: int, admin_id: int | None) -> Dict:
+        """Make query fields of post."""
+        if admin_id is None:
+            return {'msg_id': msg_id}
+        return {'msg_id': msg_id, 'admin_id': admin_id}
@@ -0,0 +1,160 @@
+"""Deferred deletions module.
+
+`DeferredDeletions` deletes messages after a delay by single task instead of
+task parked in `asyncio.sleep` per message. Jobs are kept in min-heap by due
+time and saved to snapshot, so messages scheduled before restart are still
+deleted: overdue ones right after startup. Jobs, which come due within
+`BATCH_WINDOW` seconds, are deleted together by one `deleteMessages` call
+per chat. Jobs stay in snapshot until their deletion is done, deletions
+failed by network errors are retried after `RETRY_DELAY` seconds.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+from heapq import heapify, heappop, heappush
+from time import time
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+from telebot.asyncio_helper import ApiTelegramException
+
+from utils.database import MessagesToPreventDeletingDB
+from utils.helpers import wait_wakeup
+from utils.logger import log
+from utils.storages import Snapshot
+
+if TYPE_CHECKING:
+    from bot import Bot
+
+# Jobs due within this many seconds after the earliest one are deleted with it
+BATCH_WINDOW = 1.0
+# Bot API limit of messages in one deleteMessages call
+DELETE_BATCH_SIZE = 100
+# Seconds before retry of deletion failed by network error
+RETRY_DELAY = 30.0
+
+# Due time, chat id, message id, can deletion be cancelled by user
+Job = Tuple[float, int, int, bool]
+
+
+class DeferredDeletions:
+    """Scheduler of deferred message deletions.
+
+    Args:
+        `bot (Bot)`: Bot, which deletes messages.
+        `snapshot (str)`: Snapshot file of scheduled jobs.
+        `snapshot_interval (float)`: Seconds between the first change and writing.
+    """
+
+    def __init__(self, bot: Bot, snapshot: str = 'db/deferred_deletions.json',
+                 snapshot_interval: float = 5.0):
+        self.bot = bot
+        self.heap: List[Job] = []
+        # Jobs being deleted, they are saved to snapshot until deletion is done
+        self.running: List[Job] = []
+        self.snapshot = Snapshot(snapshot, lambda: self.heap + self.running, snapshot_interval)
+        self.heap = [tuple(job) for job in self.snapshot.load([])]
+        heapify(self.heap)
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def schedule(self, chat_id: int, message_id: int, delay: float,
+                 cancellable: bool = False) -> None:
+        """Schedule deletion of message.
+
+        Args:
+            `chat_id (int)`: Chat of message.
+            `message_id (int)`: Message to delete.
+            `delay (float)`: Seconds before deletion.
+            `cancellable (bool)`: Skip deletion, if message is added to
+                `MessagesToPreventDeletingDB` by then.
+        """
+        heappush(self.heap, (time() + delay, chat_id, message_id, cancellable))
+        self.snapshot.changed()
+        self.start()
+        self._wakeup.set()
+
+    def start(self) -> None:
+        """Start deleting jobs as they come due, overdue ones are deleted at once."""
+        if self._task is None or self._task.done():
+            # Jobs of stopped task were not deleted
+            for job in self.running:
+                heappush(self.heap, job)
+            self.running = []
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self.run())
+
+    async def run(self) -> None:
+        """Wait for due jobs and delete them."""
+        while True:
+            wait = self.heap[0][0] - time() if self.heap else None
+            if wait is None or wait > 0:
+                # New job may come due earlier, so do not sleep past it
+                await wait_wakeup(self._wakeup, wait)
+                continue
+
+            horizon = time() + BATCH_WINDOW
+            while self.heap and self.heap[0][0] <= horizon:
+                self.running.append(heappop(self.heap))
+            failed = await self.delete(self.running)
+            self.running = []
+            for _, chat_id, message_id, cancellable in failed:
+                heappush(self.heap, (time() + RETRY_DELAY, chat_id, message_id, cancellable))
+            self.snapshot.changed()
+
+    async def delete(self, jobs: List[Job]) -> List[Job]:
+        """Delete messages of jobs, one request per chat.
+
+        Returns:
+            `List[Job]`: Jobs failed by network errors, they should be retried.
+        """
+        kept = MessagesToPreventDeletingDB()
+        chats: Dict[int, List[Job]] = defaultdict(list)
+        for job in jobs:
+            _, chat_id, message_id, cancellable = job
+            if cancellable and kept.pop(message_id):
+                continue
+            chats[chat_id].append(job)
+
+        results = await asyncio.gather(*(
+            self.delete_chunk(chat_id, chat_jobs[i:i + DELETE_BATCH_SIZE])
+            for chat_id, chat_jobs in chats.items()
+            for i in range(0, len(chat_jobs), DELETE_BATCH_SIZE)))
+        return [job for failed in results for job in failed]
+
+    async def delete_chunk(self, chat_id: int, jobs: List[Job]) -> List[Job]:
+        """Delete messages of chat by one request, one by one if it fails.
+
+        Returns:
+            `List[Job]`: Jobs failed by network errors.
+        """
+        message_ids = [message_id for _, _, message_id, _ in jobs]
+        try:
+            await self.bot.delete_messages(chat_id, message_ids)
+            log.info('Deferred deletion of messages %s in chat %s', message_ids, chat_id)
+            return []
+        except ApiTelegramException as ex:
+            log.warning('Deferred deletion of messages %s in chat %s failed: %s, '
+                        'deleting one by one', message_ids, chat_id, ex)
+        except Exception as ex:  # pylint: disable=broad-except
+            log.error('Deferred deletion of messages %s in chat %s failed: %s, '
+                      'retry in %s s', message_ids, chat_id, ex, RETRY_DELAY)
+            return jobs
+
+        results = await asyncio.gather(*(self.bot.delete_message(chat_id, message_id)
+                                          for message_id in message_ids),
+                                        return_exceptions=True)
+        failed = []
+        for job, result in zip(jobs, results):
+            if isinstance(result, ApiTelegramException):
+                # Message may be already deleted by its sender or admin
+                log.info('Deferred deletion of message %s in chat %s failed: %s',
+                         job[2], chat_id, result)
+            elif isinstance(result, Exception):
+                log.error('Deferred deletion of message %s in chat %s failed: %s, '
+                          'retry in %s s', job[2], chat_id, result, RETRY_DELAY)
+                failed.append(job)
+        return failed
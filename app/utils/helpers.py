@@ -1,6 +1,7 @@
 """ Helpers module """
 from __future__ import annotations
 
+import asyncio
 import re
 from typing import TYPE_CHECKING
 
@@ -11,6 +12,14 @@ from utils.premoderation.helpers import get_sender_of_message
 if TYPE_CHECKING:
     from bot import Bot
 
+ANCHOR_RE = re.compile(r'</?a.*?>')
+PLAIN_LINK_RE = re.compile(r'https?://\S+', re.I)
+HASHTAG_RE = re.compile(r'#\w+')
+EMAIL_RE = re.compile(r'[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+')
+MENTION_RE = re.compile(r'@\w+')
+BREAKS_RE = re.compile(r'\n{3,}')
+SPACES_RE = re.compile(r' {2,}')
+
 
 def reply_keyboard_markup_from_list(list_of_items: list, one_time_keyboard: bool = False,
                                     resize_keyboard: bool = True):
@@ -65,13 +74,12 @@ def make_meta_string(sender: dict) -> str:
 
 def strip_emails(text: str) -> str:
     """ Strip all emails from text """
-    email_regex = r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+"
-    return re.sub(email_regex, "", text)
+    return EMAIL_RE.sub("", text)
 
 
 def strip_mentions(text: str) -> str:
     """Strip mentions from text"""
-    return re.sub(r"@(\w+)", "", text)
+    return MENTION_RE.sub("", text)
 
 
 def collapse_spaces(text: str) -> str:
@@ -81,22 +89,22 @@ def collapse_spaces(text: str) -> str:
 
 def collapse_breaks(text: str) -> str:
     """Collapse few breaks not more then 2"""
-    return re.sub(r"\n{3,}", "\n\n", text)
+    return BREAKS_RE.sub("\n\n", text)
 
 
 def strip_plain_links(text: str) -> str:
     """Strip links from text"""
-    return re.sub(r"https?://\S+", "", text, flags=re.I)
+    return PLAIN_LINK_RE.sub("", text)
 
 
 def strip_links(html_text: str) -> str:
     """Strip links from html text"""
-    return re.sub(r"</?a.*?>", r"", html_text)
+    return ANCHOR_RE.sub("", html_text)
 
 
 def strip_hashtags(text: str) -> str:
     """Strip hashtags from text"""
-    return re.sub(r"#(\w+)", "", text)
+    return HASHTAG_RE.sub("", text)
 
 
 def strip_unavailable_tags(html_text: str) -> str:
@@ -115,20 +123,31 @@ def strip_unavailable_tags(html_text: str) -> str:
 
 
 def message_text_filter(html_text: str) -> str:
-    """Strip links and hashtags from html text and other unnecessary stuff"""
-    strippers = [
-        strip_links,
-        strip_plain_links,
-        strip_hashtags,
-        strip_emails,
-        strip_mentions,
-        collapse_breaks,
-        collapse_spaces,
-        # strip_unavailable_tags
-    ]
-    for stripper in strippers:
-        html_text = stripper(html_text)
-    return html_text.strip()
+    """Strip links and hashtags from html text and other unnecessary stuff.
+
+    Same as applying `strip_links`, `strip_plain_links`, `strip_hashtags`,
+    `strip_emails`, `strip_mentions`, `collapse_breaks` and `collapse_spaces`
+    in turn, but patterns are precompiled and stripper is skipped, if text
+    has no character its pattern needs.
+    """
+    if '<' in html_text:
+        html_text = ANCHOR_RE.sub('', html_text)
+    if '://' in html_text:
+        html_text = PLAIN_LINK_RE.sub('', html_text)
+    if '#' in html_text:
+        html_text = HASHTAG_RE.sub('', html_text)
+    if '@' in html_text:
+        html_text = MENTION_RE.sub('', EMAIL_RE.sub('', html_text))
+    return collapse_whitespace(html_text).strip()
+
+
+def collapse_whitespace(text: str) -> str:
+    """Collapse breaks not more then 2 and spaces into one."""
+    if '\n\n\n' in text:
+        text = BREAKS_RE.sub('\n\n', text)
+    if '  ' in text:
+        text = SPACES_RE.sub(' ', text)
+    return text
 
 
 async def edit_message(bot: Bot, message: Message, new_text: str, **kwargs):
@@ -146,6 +165,19 @@ async def edit_message(bot: Bot, message: Message, new_text: str, **kwargs):
     return await getattr(bot, f"edit_message_{message_text_type}")(**params)
 
 
+async def wait_wakeup(event: asyncio.Event, timeout: float | None = None) -> None:
+    """Clear event and wait until it is set again or timeout passes.
+
+    Lets scheduler task sleep until its next due item, while new item, which
+    may be due earlier, wakes it up by setting the event.
+    """
+    event.clear()
+    try:
+        await asyncio.wait_for(event.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+
+
 class Singletone(type):
     """Abstract class for singleton pattern."""
 
@@ -0,0 +1,240 @@
+"""Outbound requests module.
+
+`OutboundScheduler` wraps Bot API methods of bot, so every send, edit and
+delete waits for its turn. Turns are given in priority order: edits and
+answers to users go before new messages, deletions go last. Request goes
+only when the global bucket and the bucket of its chat have a token, so
+Telegram limits are not hit under a posting burst. If Telegram still
+answers 429, the chat (or the whole bot for requests without chat) is
+paused for `retry_after` seconds and the request is queued again.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from enum import IntEnum
+from functools import wraps
+import inspect
+from time import monotonic
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Tuple
+
+from telebot.asyncio_helper import ApiTelegramException
+
+from utils.helpers import wait_wakeup
+from utils.logger import log
+from utils.ratelimit import TokenBucket
+
+# Telegram limits: 30 messages per second overall, 1 message per second in
+# a private chat and 20 messages per minute in a group
+GLOBAL_LIMIT = (30, 1.0)
+PRIVATE_CHAT_LIMIT = (1, 1.0)
+GROUP_LIMIT = (20, 60.0)
+# Periods of limits are stretched by this factor, so requests granted in turn
+# do not reach Telegram closer than allowed due to network jitter
+PERIOD_MARGIN = 1.05
+# Requests are retried after 429 at most this many times
+MAX_RETRIES = 3
+# Longer flood waits still pause the chat, but are raised to caller at once
+MAX_RETRY_AFTER = 60.0
+
+
+class Priority(IntEnum):
+    """Priority of request, lower goes first."""
+    EDIT = 0
+    SEND = 1
+    DELETE = 2
+
+
+# Wrapped methods: priority and whether they count to limit of chat
+METHODS: Dict[str, Tuple[Priority, bool]] = {
+    'answer_callback_query': (Priority.EDIT, False),
+    'edit_message_text': (Priority.EDIT, True),
+    'edit_message_caption': (Priority.EDIT, True),
+    'edit_message_reply_markup': (Priority.EDIT, True),
+    'send_message': (Priority.SEND, True),
+    'send_photo': (Priority.SEND, True),
+    'send_video': (Priority.SEND, True),
+    'send_document': (Priority.SEND, True),
+    'send_animation': (Priority.SEND, True),
+    'send_media_group': (Priority.SEND, True),
+    'copy_message': (Priority.SEND, True),
+    'forward_message': (Priority.SEND, True),
+    'delete_message': (Priority.DELETE, False),
+    'delete_messages': (Priority.DELETE, False),
+}
+
+
+class Request:
+    """Queued request waiting for its turn."""
+
+    __slots__ = ('chat_id', 'limited', 'future', 'queued')
+
+    def __init__(self, chat_id: Hashable | None, limited: bool, future: asyncio.Future):
+        self.chat_id = chat_id
+        self.limited = limited
+        self.future = future
+        self.queued = monotonic()
+
+
+class OutboundScheduler:
+    """Scheduler of outbound Bot API requests.
+
+    Args:
+        `global_limit (Tuple[int, float])`: Requests and period of the bot.
+        `private_limit (Tuple[int, float])`: Messages and period of private chat.
+        `group_limit (Tuple[int, float])`: Messages and period of group chat.
+    """
+
+    def __init__(self, global_limit: Tuple[int, float] = GLOBAL_LIMIT,
+                 private_limit: Tuple[int, float] = PRIVATE_CHAT_LIMIT,
+                 group_limit: Tuple[int, float] = GROUP_LIMIT):
+        self.global_bucket, self.private_bucket, self.group_bucket = (
+            TokenBucket(capacity, period * PERIOD_MARGIN)
+            for capacity, period in (global_limit, private_limit, group_limit))
+        self.queues: List[Deque[Request]] = [deque() for _ in Priority]
+        # Monotonic time until which chat is paused by 429, None key pauses all
+        self.paused: Dict[Hashable | None, float] = {}
+        self.metrics = {
+            'granted': 0,
+            'retried': 0,
+            'max_depth': 0,
+            'wait_time': 0.0,
+        }
+        self._wakeup: asyncio.Event | None = None
+        self._dispatcher: asyncio.Task | None = None
+
+    def wrap(self, bot: Any) -> None:
+        """Route Bot API methods of bot through scheduler."""
+        for name, (priority, limited) in METHODS.items():
+            if hasattr(bot, name):
+                setattr(bot, name, self.scheduled(getattr(bot, name), priority, limited))
+
+    def scheduled(self, method: Callable[..., Awaitable], priority: Priority,
+                  limited: bool) -> Callable[..., Awaitable]:
+        """Wrap Bot API method, so each call waits for its turn."""
+        parameters = list(inspect.signature(method).parameters)
+        chat_index = parameters.index('chat_id') if 'chat_id' in parameters else None
+
+        @wraps(method)
+        async def call(*args, **kwargs):
+            chat_id = kwargs.get('chat_id')
+            if chat_id is None and chat_index is not None and len(args) > chat_index:
+                chat_id = args[chat_index]
+            for attempt in range(MAX_RETRIES + 1):
+                await self.acquire(chat_id, priority, limited)
+                try:
+                    return await method(*args, **kwargs)
+                except ApiTelegramException as ex:
+                    if ex.error_code != 429:
+                        raise
+                    retry_after = (ex.result_json.get('parameters') or {}).get('retry_after', 1)
+                    self.pause(chat_id, retry_after)
+                    if attempt == MAX_RETRIES or retry_after > MAX_RETRY_AFTER:
+                        raise
+                    self.metrics['retried'] += 1
+                    log.warning('Outbound %s to %s hit flood limit, retry after %s s',
+                                method.__name__, chat_id, retry_after)
+            return None
+        return call
+
+    async def acquire(self, chat_id: Hashable | None, priority: Priority = Priority.SEND,
+                      limited: bool = True) -> None:
+        """Wait for turn of request to chat.
+
+        Args:
+            `chat_id (Hashable | None)`: Chat of request, None if it has no chat.
+            `priority (Priority)`: Priority of request.
+            `limited (bool)`: Does request count to limit of chat.
+        """
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self.dispatch())
+        request = Request(chat_id, limited and chat_id is not None,
+                          asyncio.get_running_loop().create_future())
+        self.queues[priority].append(request)
+        self.metrics['max_depth'] = max(self.metrics['max_depth'], self.depth())
+        self._wakeup.set()
+        await request.future
+
+    def pause(self, chat_id: Hashable | None, seconds: float) -> None:
+        """Pause requests to chat, or all requests if chat is None."""
+        until = monotonic() + seconds
+        self.paused[chat_id] = max(self.paused.get(chat_id, 0.0), until)
+
+    def depth(self) -> int:
+        """Number of queued requests."""
+        return sum(map(len, self.queues))
+
+    def stats(self) -> Dict:
+        """Get queue depth and counters."""
+        return {
+            **self.metrics,
+            'depth': self.depth(),
+            'depth_by_priority': {priority.name: len(self.queues[priority])
+                                  for priority in Priority},
+            'mean_wait': self.metrics['wait_time'] / (self.metrics['granted'] or 1),
+        }
+
+    def chat_bucket(self, chat_id: Hashable) -> TokenBucket:
+        """Get bucket of chat, groups have negative ids and channels have usernames."""
+        if str(chat_id).startswith(('-', '@')):
+            return self.group_bucket
+        return self.private_bucket
+
+    def wait_time(self, request: Request, now: float) -> float:
+        """Seconds until request to chat may go, ignoring the global bucket."""
+        wait = self.paused.get(request.chat_id, 0.0) - now
+        if request.limited:
+            wait = max(wait, self.chat_bucket(request.chat_id).retry_after(request.chat_id))
+        return wait
+
+    def next_request(self) -> Tuple[Request | None, float]:
+        """Find the first request in priority order, which chat is ready.
+
+        Returns:
+            `Tuple[Request | None, float]`: Request, or None and seconds until
+                the earliest blocked chat is ready.
+        """
+        now = monotonic()
+        earliest = float('inf')
+        blocked = set()
+        for queue in self.queues:
+            for request in queue:
+                if request.future.cancelled():
+                    queue.remove(request)
+                    return self.next_request()
+                if request.chat_id in blocked:
+                    continue
+                wait = self.wait_time(request, now)
+                if wait <= 0:
+                    queue.remove(request)
+                    return request, 0.0
+                blocked.add(request.chat_id)
+                earliest = min(earliest, wait)
+        return None, earliest
+
+    async def dispatch(self) -> None:
+        """Give turns to queued requests while limits allow."""
+        while True:
+            if not self.depth():
+                await wait_wakeup(self._wakeup)
+                continue
+
+            wait = max(self.paused.get(None, 0.0) - monotonic(),
+                       self.global_bucket.retry_after('global'))
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+
+            request, wait = self.next_request()
+            if request is None:
+                # New request may be to a ready chat, so do not sleep past it
+                await wait_wakeup(self._wakeup, wait)
+                continue
+
+            self.global_bucket.hit('global')
+            if request.limited:
+                self.chat_bucket(request.chat_id).hit(request.chat_id)
+            self.metrics['granted'] += 1
+            self.metrics['wait_time'] += monotonic() - request.queued
+            request.future.set_result(None)
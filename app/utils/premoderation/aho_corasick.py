@@ -0,0 +1,108 @@
+"""Aho-Corasick module.
+
+Automaton finds any of compiled patterns in text in a single pass, time does
+not depend on number of patterns. Text and patterns are normalized the same
+way, so case, `ё`, look-alike latin letters and digits, punctuation and
+repeated letters do not hide a pattern.
+"""
+from __future__ import annotations
+
+from collections import deque
+import re
+from typing import Dict, Generic, Iterable, List, Tuple, TypeVar
+
+T = TypeVar('T')
+
+HOMOGLYPHS = str.maketrans({
+    'a': 'а', 'b': 'в', 'c': 'с', 'e': 'е', 'h': 'н', 'k': 'к', 'm': 'м', 'o': 'о',
+    'p': 'р', 't': 'т', 'x': 'х', 'y': 'у',
+    'ё': 'е', '0': 'о', '3': 'з', '4': 'ч', '6': 'б',
+})
+SEPARATORS_RE = re.compile(r'[\W_]+')
+REPEATS_RE = re.compile(r'(\w)\1+')
+
+
+def normalize(text: str) -> str:
+    """Normalize text for matching.
+
+    Lowercases text, folds look-alike characters into cyrillic ones, replaces
+    punctuation and spaces with single space and collapses repeated letters.
+    """
+    text = text.lower().translate(HOMOGLYPHS)
+    text = SEPARATORS_RE.sub(' ', text)
+    return ' ' + REPEATS_RE.sub(r'\1', text).strip() + ' '
+
+
+class Automaton(Generic[T]):
+    """Aho-Corasick automaton.
+
+    Args:
+        `patterns (Iterable[Tuple[str, T]])`: Patterns with values returned on match.
+            Pattern with spaces on the edges matches whole words only.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, T]]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        # Value of the pattern, which ends in state or its suffix states
+        self.match: List[T | None] = [None]
+        self.size = 0
+        for pattern, value in patterns:
+            self.add(pattern, value)
+        self.build()
+
+    def __len__(self) -> int:
+        return self.size
+
+    @staticmethod
+    def prepare(pattern: str) -> str:
+        """Normalize pattern, keep spaces on the edges."""
+        normalized = normalize(pattern).strip()
+        return ' ' * pattern.startswith(' ') + normalized + ' ' * pattern.endswith(' ')
+
+    def add(self, pattern: str, value: T) -> None:
+        """Add pattern to trie."""
+        pattern = self.prepare(pattern)
+        if not pattern.strip():
+            return
+        state = 0
+        for char in pattern:
+            if (next_state := self.goto[state].get(char)) is None:
+                next_state = self.goto[state][char] = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.match.append(None)
+            state = next_state
+        if self.match[state] is None:
+            self.match[state] = value
+            self.size += 1
+
+    def build(self) -> None:
+        """Set failure links with breadth-first traversal of trie."""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                fail = self.fail[state]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[next_state] = self.goto[fail].get(char, 0)
+                if self.match[next_state] is None:
+                    self.match[next_state] = self.match[self.fail[next_state]]
+                queue.append(next_state)
+
+    def search(self, text: str) -> T | None:
+        """Find the first pattern in normalized text.
+
+        Returns:
+            `T | None`: Value of found pattern.
+        """
+        goto, fail, match = self.goto, self.fail, self.match
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if match[state] is not None:
+                return match[state]
+        return None
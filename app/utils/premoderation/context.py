@@ -0,0 +1,105 @@
+"""Message context module."""
+from __future__ import annotations
+
+from functools import cached_property
+from hashlib import blake2b
+import json
+from typing import TYPE_CHECKING, List
+
+from utils.helpers import make_meta_string, message_text_filter
+
+from .entities import Sanitized, sanitize
+from .helpers import get_message_text_type, get_sender_of_message, get_user_link
+from .minhash import signature
+
+if TYPE_CHECKING:
+    from telebot.types import Message, MessageEntity
+
+
+class MessageContext:
+    """Message with lazily computed derived values.
+
+    Every value is computed on the first access and then reused, so validators
+    and handlers, which process the same update, share them.
+    """
+
+    def __init__(self, message: Message) -> None:
+        self.message = message
+
+    def __repr__(self) -> str:
+        return f'MessageContext(chat_id={self.message.chat.id}, message_id={self.message.id})'
+
+    @cached_property
+    def sender(self) -> dict:
+        """Sender of message."""
+        return get_sender_of_message(self.message)
+
+    @cached_property
+    def user_link(self) -> str:
+        """HTML link to sender of message."""
+        return get_user_link(self.sender)
+
+    @cached_property
+    def text_type(self) -> str:
+        """Text field of message, `text` or `caption`."""
+        return get_message_text_type(self.message)
+
+    @cached_property
+    def text(self) -> str:
+        """Plain text of message."""
+        return getattr(self.message, self.text_type) or ''
+
+    @cached_property
+    def html_text(self) -> str:
+        """HTML text of message."""
+        return getattr(self.message, f'html_{self.text_type}') or ''
+
+    @cached_property
+    def entities(self) -> List[MessageEntity]:
+        """Entities of text of message."""
+        return getattr(self.message, 'entities' if self.text_type == 'text'
+                       else 'caption_entities') or []
+
+    @cached_property
+    def sanitized(self) -> Sanitized:
+        """Text of message sanitized by its entities."""
+        return sanitize(self.text, self.entities)
+
+    @cached_property
+    def filtered_text(self) -> str:
+        """HTML text of message without links, hashtags and other unnecessary stuff.
+
+        Text sanitized by entities is filtered as HTML text was before, so admins
+        get the same text, even if Telegram has not marked something as entity.
+        """
+        return message_text_filter(self.sanitized.html_text)
+
+    @cached_property
+    def signature(self) -> bytes | None:
+        """MinHash signature of filtered text, None if text is too short."""
+        return signature(self.filtered_text)
+
+    @cached_property
+    def file_unique_id(self) -> str | None:
+        """Unique id of media file of message."""
+        media = getattr(self.message, self.message.content_type, None)
+        if isinstance(media, list):
+            media = media[-1] if media else None
+        return getattr(media, 'file_unique_id', None)
+
+    @cached_property
+    def content_key(self) -> str:
+        """Hash of text, entities and media of message.
+
+        Text is taken as is, so any change, which validators may decline,
+        e.g. added emoji or hidden link, gives another key.
+        """
+        entities = [(entity.type, entity.offset, entity.length, entity.url)
+                    for entity in self.entities]
+        content = json.dumps([self.file_unique_id, self.text, entities], ensure_ascii=False)
+        return blake2b(content.encode(), digest_size=16).hexdigest()
+
+    @cached_property
+    def meta(self) -> str:
+        """Meta string with sender data."""
+        return make_meta_string(self.sender)
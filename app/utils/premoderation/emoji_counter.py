@@ -0,0 +1,98 @@
+"""Emoji counter module.
+
+Counts emoji the same way as `emoji.emoji_count`, but stops as soon as
+count exceeds the limit. Text is scanned for possible first codepoints of
+emoji by one compiled regex, so text without emoji is skipped in C. From
+every candidate the longest emoji sequence is matched by trie built from
+`emoji.EMOJI_DATA`: RGI ZWJ sequences, skin tones, flags and keycaps are
+counted as one emoji, components of non-RGI ZWJ sequences are counted
+separately, as they are rendered. Counts differ only for malformed
+sequences with dangling ZWJ, which `emoji` splits into extra emoji.
+"""
+from __future__ import annotations
+
+import re
+from typing import Dict, Iterable, List, Tuple
+
+from emoji import EMOJI_DATA
+
+KEYCAP = '⃣'
+KEYCAP_BASES = frozenset('#*0123456789')
+VARIATION_SELECTOR = '️'
+# Codepoints closer than this are joined into one range of candidate class
+RANGE_GAP = 0x100
+
+# Trie of emoji sequences, key of terminal node is empty string
+Trie = Dict[str, 'Trie']
+
+
+def build_trie(sequences: Iterable[str]) -> Trie:
+    """Build trie of emoji sequences."""
+    trie: Trie = {}
+    for sequence in sequences:
+        node = trie
+        for char in sequence:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return trie
+
+
+def build_candidates(firsts: Iterable[str]) -> re.Pattern:
+    """Compile class of codepoints, which may start emoji.
+
+    Close codepoints are joined into ranges: false candidates are rejected by
+    trie, but class of few ranges is matched much faster.
+    """
+    ranges: List[Tuple[int, int]] = []
+    for code in sorted(map(ord, firsts)):
+        if ranges and code - ranges[-1][1] <= RANGE_GAP:
+            ranges[-1] = (ranges[-1][0], code)
+        else:
+            ranges.append((code, code))
+    return re.compile('[%s]' % ''.join(f'{re.escape(chr(start))}-{re.escape(chr(end))}'
+                                       for start, end in ranges))
+
+
+# Keycaps start with ASCII characters, so they are found by `KEYCAP` at their end
+TRIE = build_trie(sequence for sequence in EMOJI_DATA if sequence[-1] != KEYCAP)
+CANDIDATES_RE = build_candidates([*TRIE, KEYCAP])
+
+
+def count_emoji(text: str, limit: int | None = None) -> int:
+    """Count emoji in text.
+
+    Args:
+        `text (str)`: Plain text.
+        `limit (int | None)`: Stop counting after `limit + 1` emoji are found.
+
+    Returns:
+        `int`: Number of emoji, at most `limit + 1` if limit is set.
+    """
+    count = 0
+    position = 0
+    length = len(text)
+    search = CANDIDATES_RE.search
+    while (candidate := search(text, position)) is not None:
+        start = position = candidate.start()
+        if text[start] == KEYCAP:
+            # Keycap base is right before, optionally with variation selector
+            base = start - 2 if text[start - 1:start] == VARIATION_SELECTOR else start - 1
+            position = start + 1
+            if base < 0 or text[base] not in KEYCAP_BASES:
+                continue
+        else:
+            # The longest sequence, which ends in terminal node
+            node = TRIE
+            end = index = start
+            while index < length and (node := node.get(text[index])) is not None:
+                index += 1
+                if '' in node:
+                    end = index
+            if end == start:
+                position = start + 1
+                continue
+            position = end
+        count += 1
+        if limit is not None and count > limit:
+            break
+    return count
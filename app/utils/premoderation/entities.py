@@ -0,0 +1,117 @@
+"""Message entities module.
+
+Sanitizes message text using entities, which Telegram has already parsed:
+links, mentions, emails and hashtags are removed, formatting is rendered to
+HTML. Entities are handled in a single pass over the text, which also
+reports types of found entities. Stripped entities are removed at any
+nesting depth, nested formatting is ignored. Links, mentions, emails and
+hashtags, which have no entity, are removed by one compiled regex.
+"""
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING, FrozenSet, List, NamedTuple, Set
+
+if TYPE_CHECKING:
+    from telebot.types import MessageEntity
+
+# Entities, which are removed with their text
+STRIP_TYPES = frozenset({'url', 'email', 'mention', 'hashtag'})
+# Entities, which are links
+LINK_TYPES = frozenset({'url', 'text_link'})
+TAGS = {
+    'bold': '<b>{}</b>',
+    'italic': '<i>{}</i>',
+    'underline': '<u>{}</u>',
+    'strikethrough': '<s>{}</s>',
+    'spoiler': '<span class="tg-spoiler">{}</span>',
+    'code': '<code>{}</code>',
+    'pre': '<pre>{}</pre>',
+}
+
+FALLBACK_RE = re.compile(
+    r'(?P<url>https?://\S+)'
+    r'|(?P<email>[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)'
+    r'|(?P<mention>@\w+)'
+    r'|(?P<hashtag>#\w+)',
+    re.I)
+BREAKS_RE = re.compile(r'\n{3,}')
+SPACES_RE = re.compile(r' {2,}')
+ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+
+
+class Sanitized(NamedTuple):
+    """Sanitized text of message."""
+    html_text: str
+    # Types of entities found in text
+    types: FrozenSet[str]
+
+
+def sanitize(text: str, entities: List[MessageEntity] | None) -> Sanitized:
+    """Remove links, mentions, emails and hashtags from text and render it to HTML.
+
+    Args:
+        `text (str)`: Plain text of message.
+        `entities (List[MessageEntity] | None)`: Entities of text.
+    """
+    if not entities:
+        return sanitize_untagged(text)
+
+    # Entity offsets are in UTF-16 code units
+    utf16 = text.encode('utf-16-le')
+    types = {entity.type for entity in entities}
+    # Stripped entities are removed at any nesting depth
+    stripped = sorted((entity.offset, entity.offset + entity.length)
+                      for entity in entities if entity.type in STRIP_TYPES)
+
+    def plain(start: int, end: int) -> str:
+        """Text between offsets without stripped entities and links they missed."""
+        pieces = []
+        for strip_start, strip_end in stripped:
+            if strip_end <= start or strip_start >= end:
+                continue
+            if strip_start > start:
+                pieces.append(utf16[start * 2:strip_start * 2])
+            start = max(start, strip_end)
+        if start < end:
+            pieces.append(utf16[start * 2:end * 2])
+        return ''.join(strip_untagged(piece.decode('utf-16-le'), types) for piece in pieces)
+
+    parts = []
+    offset = 0
+    for entity in entities:
+        # Formatting nested into another entity is ignored, as in rendering of telebot
+        if entity.type in STRIP_TYPES or entity.offset < offset:
+            continue
+        parts.append(plain(offset, entity.offset))
+        offset = entity.offset + entity.length
+        chunk = plain(entity.offset, offset)
+        tag = TAGS.get(entity.type)
+        parts.append(tag.format(chunk) if tag and chunk.strip() else chunk)
+    parts.append(plain(offset, len(utf16) // 2))
+    return Sanitized(collapse(''.join(parts)), frozenset(types))
+
+
+def sanitize_untagged(text: str) -> Sanitized:
+    """Sanitize text without entities."""
+    types = set()
+    return Sanitized(collapse(strip_untagged(text, types)), frozenset(types))
+
+
+def strip_untagged(text: str, types: Set[str]) -> str:
+    """Remove links, mentions, emails and hashtags, which have no entity, and escape text.
+
+    Args:
+        `text (str)`: Plain text.
+        `types (Set[str])`: Types of removed parts are added to it.
+    """
+    def strip(match: re.Match) -> str:
+        types.add(match.lastgroup)
+        return ''
+
+    return FALLBACK_RE.sub(strip, text).translate(ESCAPES)
+
+
+def collapse(html_text: str) -> str:
+    """Collapse more than 2 line breaks and repeated spaces."""
+    return SPACES_RE.sub(' ', BREAKS_RE.sub('\n\n', html_text)).strip()
@@ -3,3 +3,7 @@ from .whitelist import WhiteList
 from .length import Length
 from .emoji import EmojiTool
 from .banned import BannedUsersValidationHandler
+from .duplicates import Duplicates
+from .stopwords import StopWords
+from .links import Links
+from .quota import Quota
@@ -4,11 +4,8 @@ from __future__ import annotations
 from enum import Enum
 from typing import TYPE_CHECKING
 
-
-from ..helpers import get_sender_of_message, get_user_link
-
 if TYPE_CHECKING:
-    from telebot.types import Message
+    from ..context import MessageContext
     from ..premoderation import Premoderation
 
 
@@ -21,13 +18,11 @@ class BannedUsersValidationHandler:
         self.decline = lambda text: self.moder.Status.decline(text, 'banned')
         self.is_banned_callback = is_banned_callback
 
-    def validate(self,  message: Message) -> bool:
+    def validate(self,  context: MessageContext) -> bool:
         """Validate message."""
-        sender = get_sender_of_message(message)
-        user_link = get_user_link(sender)
-        if self.is_banned_callback(sender):
+        if self.is_banned_callback(context.sender):
             rules_link = self.moder.bot.Strings.rules_link('правилами')
-            return self.decline(self.Messages.SPAM.value % (user_link, rules_link))
+            return self.decline(self.Messages.SPAM.value % (context.user_link, rules_link))
         return self.valid()
 
     class Messages(Enum):
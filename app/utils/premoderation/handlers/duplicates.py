@@ -0,0 +1,75 @@
+"""Near-duplicate posts validation handler for premoderation."""
+from __future__ import annotations
+
+import asyncio
+from enum import Enum
+from typing import TYPE_CHECKING
+
+from utils.storages import Snapshot
+
+from ..minhash import MinHashIndex, signature
+
+if TYPE_CHECKING:
+    from ..context import MessageContext
+    from ..premoderation import Premoderation
+
+
+class Duplicates:
+    """Near-duplicate posts validation handler.
+
+    Keeps MinHash signatures of posts published by moderators in the last
+    `days` days. Near-duplicate of the sender's own post is declined,
+    near-duplicate of another sender's post is only logged. Posts declined by
+    moderators are not kept, so sender may fix and resubmit them.
+    """
+
+    def __init__(self, moder: Premoderation, days: int = 7, threshold: float = 0.6,
+                 snapshot: str = 'db/duplicates.json') -> None:
+        self.moder = moder
+        self.days = days
+        self.valid = lambda: self.moder.Status.valid('Duplicates')
+        self.decline = lambda text: self.moder.Status.decline(text, 'Duplicates')
+
+        self.index = MinHashIndex(window=days * 24 * 60 * 60, threshold=threshold)
+        self.snapshot = Snapshot(snapshot, self.index.dump)
+        self.index.load(self.snapshot.load([]))
+
+    async def validate(self, context: MessageContext) -> bool:
+        """Validate message.
+
+        Only signature is computed in thread pool. Index is looked up on the
+        event loop, where it is changed by `add` and dumped to snapshot.
+        """
+        text_signature = await asyncio.get_running_loop().run_in_executor(
+            self.moder.executor, getattr, context, 'signature')
+        if text_signature is None:
+            return self.valid()
+
+        sender_id = context.sender['chat_id']
+        found = self.index.find(text_signature)
+        if any(entry[2] == sender_id for entry in found):
+            return self.decline(
+                Duplicates.Messages.DUPLICATE.value % (context.user_link, self.days))
+        if found:
+            self.moder.log.info("Post of %s is similar to posts of %s",
+                                sender_id, [entry[2] for entry in found])
+        return self.valid()
+
+    async def add(self, html_text: str, sender_id: str) -> None:
+        """Remember published post.
+
+        Args:
+            `html_text (str)`: Filtered text of post, as it was sent to moderation.
+            `sender_id (str)`: Chat id of sender.
+        """
+        text_signature = await asyncio.get_running_loop().run_in_executor(
+            self.moder.executor, signature, html_text)
+        if text_signature is None:
+            return
+        self.index.add(text_signature, sender_id)
+        self.snapshot.changed()
+
+    class Messages(Enum):
+        """Duplicates handler messages."""
+        DUPLICATE = ('%s, такое объявление уже было опубликовано. '
+                     'Повторная публикация оффера разрешена не чаще 1-го раза в %s дней.')
@@ -4,13 +4,11 @@ from __future__ import annotations
 from enum import Enum
 from typing import TYPE_CHECKING
 
-
-from emoji import emoji_count
-from ..helpers import (get_text_of_message,
-                       get_user_link_from_message)
+from ..emoji_counter import count_emoji
+from ..helpers import content_only
 
 if TYPE_CHECKING:
-    from telebot.types import Message
+    from ..context import MessageContext
     from ..premoderation import Premoderation
 
 
@@ -22,19 +20,18 @@ class EmojiTool:
         self.valid = lambda: self.moder.Status.valid('Emoji')
         self.decline = lambda text: self.moder.Status.decline(text, 'Emoji')
 
-    def validate(self,  message: Message) -> bool:
+    @content_only
+    def validate(self,  context: MessageContext) -> bool:
         """Validate message."""
         limit = self.moder.get_limit('emoji')
         if limit is None:
             return self.valid()
 
-        text = get_text_of_message(message)
-        count = emoji_count(text)
+        count = count_emoji(context.text, limit)
         if count <= limit:
             return self.valid()
 
-        user_link = get_user_link_from_message(message)
-        return self.decline(EmojiTool.Messages.TOO_MANY_EMOJI.value % (user_link, limit))
+        return self.decline(EmojiTool.Messages.TOO_MANY_EMOJI.value % (context.user_link, limit))
 
     class Messages(Enum):
         """Emoji tool message."""
@@ -4,11 +4,10 @@ from enum import Enum
 
 from typing import TYPE_CHECKING
 
-from telebot.types import Message
-
-from ..helpers import get_message_text_type, get_text_of_message, get_user_link_from_message
+from ..helpers import content_only
 
 if TYPE_CHECKING:
+    from ..context import MessageContext
     from ..premoderation import Premoderation
 
 
@@ -20,24 +19,25 @@ class Length:
         self.valid = lambda: self.moder.Status.valid('Length')
         self.decline = lambda text: self.moder.Status.decline(text, 'Length')
 
-    def validate(self, message: Message, limit: int) -> bool:
+    def validate(self, context: MessageContext, limit: int) -> bool:
         """Check message length."""
-        if len(get_text_of_message(message)) <= limit:
+        if len(context.text) <= limit:
             return self.valid()
 
-        user_link = get_user_link_from_message(message)
-        return self.decline(Length.Messages.TOO_LONG.value % (user_link, limit))
+        return self.decline(Length.Messages.TOO_LONG.value % (context.user_link, limit))
 
-    def caption_validate(self, message: Message) -> bool:
+    @content_only
+    def caption_validate(self, context: MessageContext) -> bool:
         """Validate caption."""
-        if 'caption' == get_message_text_type(message):
-            return self.validate(message, self.moder.get_limit('caption'))
+        if 'caption' == context.text_type:
+            return self.validate(context, self.moder.get_limit('caption'))
         return self.valid()
 
-    def text_validate(self, message: Message) -> bool:
+    @content_only
+    def text_validate(self, context: MessageContext) -> bool:
         """Validate text."""
-        if 'text' == get_message_text_type(message):
-            return self.validate(message, self.moder.get_limit('text'))
+        if 'text' == context.text_type:
+            return self.validate(context, self.moder.get_limit('text'))
         return self.valid()
 
     class Messages(Enum):
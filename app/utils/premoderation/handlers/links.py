@@ -0,0 +1,32 @@
+"""Links validation handler for premoderation."""
+from __future__ import annotations
+
+from enum import Enum
+from typing import TYPE_CHECKING
+
+from ..entities import LINK_TYPES
+from ..helpers import content_only
+
+if TYPE_CHECKING:
+    from ..context import MessageContext
+    from ..premoderation import Premoderation
+
+
+class Links:
+    """Links validation handler, declines messages with links."""
+
+    def __init__(self, moder: Premoderation) -> None:
+        self.moder = moder
+        self.valid = lambda: self.moder.Status.valid('Links')
+        self.decline = lambda text: self.moder.Status.decline(text, 'Links')
+
+    @content_only
+    def validate(self, context: MessageContext) -> bool:
+        """Validate message."""
+        if context.sanitized.types.isdisjoint(LINK_TYPES):
+            return self.valid()
+        return self.decline(Links.Messages.LINK.value % context.user_link)
+
+    class Messages(Enum):
+        """Links handler messages."""
+        LINK = '%s, Ваше сообщение содержит ссылку. Запрещены любые ссылки в объявлениях.'
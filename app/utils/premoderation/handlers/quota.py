@@ -0,0 +1,46 @@
+"""Posting quota validation handler for premoderation."""
+from __future__ import annotations
+
+from enum import Enum
+from math import ceil
+from typing import TYPE_CHECKING
+
+from utils.ratelimit import SlidingWindow
+
+if TYPE_CHECKING:
+    from ..context import MessageContext
+    from ..premoderation import Premoderation
+
+
+class Quota:
+    """Posting quota validation handler.
+
+    Allows each sender `limit` posts sent to moderation in any `window`
+    seconds. Only the last `limit` post times are kept per sender.
+    """
+
+    def __init__(self, moder: Premoderation, limit: int, window: float,
+                 snapshot: str = 'db/posting_quota.json') -> None:
+        self.moder = moder
+        self.valid = lambda: self.moder.Status.valid('Quota')
+        self.decline = lambda text: self.moder.Status.decline(text, 'Quota')
+        self.window = SlidingWindow(limit, window, snapshot=snapshot)
+
+    def validate(self, context: MessageContext) -> bool:
+        """Validate message."""
+        retry_after = self.window.retry_after(context.sender['chat_id'])
+        if not retry_after:
+            return self.valid()
+
+        hours = ceil(self.window.window / 3600)
+        return self.decline(Quota.Messages.OVER_QUOTA.value % (
+            context.user_link, self.window.limit, hours, ceil(retry_after / 60)))
+
+    def add(self, context: MessageContext) -> None:
+        """Count post sent to moderation."""
+        self.window.hit(context.sender['chat_id'])
+
+    class Messages(Enum):
+        """Quota handler messages."""
+        OVER_QUOTA = ('%s, можно опубликовать не более %s объявлений за %s ч. '
+                      'Следующее объявление можно будет отправить через %s мин.')
@@ -0,0 +1,86 @@
+"""Stop words validation handler for premoderation."""
+from __future__ import annotations
+
+from enum import Enum
+from pathlib import Path
+from time import monotonic
+from typing import TYPE_CHECKING, Iterator, Tuple
+
+from ..aho_corasick import Automaton, normalize
+from ..helpers import content_only, offload
+
+if TYPE_CHECKING:
+    from ..context import MessageContext
+    from ..premoderation import Premoderation
+
+# Stop words file is checked for changes at most once per RELOAD_INTERVAL seconds
+RELOAD_INTERVAL = 5.0
+
+
+class StopWords:
+    """Stop words validation handler.
+
+    Words and phrases are read from text file, one per line, lines starting
+    with `;` are comments. `[MAT]` and `[SCAM]` lines set category of the
+    following words. Word surrounded with spaces matches whole words only,
+    otherwise it matches any part of a word. File is reloaded when changed.
+    """
+
+    def __init__(self, moder: Premoderation, path: str | Path = 'stop_words.txt') -> None:
+        self.moder = moder
+        self.path = Path(path)
+        self.valid = lambda: self.moder.Status.valid('StopWords')
+        self.decline = lambda text: self.moder.Status.decline(text, 'StopWords')
+
+        self.automaton: Automaton[str] | None = None
+        self._mtime: float | None = None
+        self._checked = 0.0
+        self.reload()
+
+    def reload(self) -> None:
+        """Compile stop words file, if it was changed."""
+        self._checked = monotonic()
+        try:
+            mtime = self.path.stat().st_mtime
+        except FileNotFoundError:
+            mtime = None
+        if self.automaton is not None and mtime == self._mtime:
+            return
+        self._mtime = mtime
+        if mtime is None:
+            self.automaton = Automaton(())
+            self.moder.log.warning("Stop words file %s not found, stop words are not checked",
+                                   self.path)
+            return
+        self.automaton = Automaton(self.read())
+        self.moder.log.info("Stop words loaded from %s: %s", self.path, len(self.automaton))
+
+    def read(self) -> Iterator[Tuple[str, str]]:
+        """Read words and their categories from file."""
+        category = self.Messages.MAT.name
+        for line in self.path.read_text(encoding='utf8').splitlines():
+            if not line.strip() or line.startswith(';'):
+                continue
+            if line.startswith('[') and line.strip().endswith(']'):
+                category = line.strip()[1:-1].upper()
+                continue
+            yield line.rstrip('\r\n'), category
+
+    @content_only
+    @offload
+    def validate(self, context: MessageContext) -> bool:
+        """Validate message."""
+        if monotonic() - self._checked > RELOAD_INTERVAL:
+            self.reload()
+
+        category = self.automaton.search(normalize(context.text))
+        if category is None:
+            return self.valid()
+
+        message = self.Messages.__members__.get(category, self.Messages.MAT)
+        return self.decline(message.value % context.user_link)
+
+    class Messages(Enum):
+        """Stop words handler messages."""
+        MAT = '%s, Ваше сообщение содержит недопустимые выражения. Запрещен мат и оскорбления.'
+        SCAM = '%s, Ваше сообщение похоже на рекламу развода или скама и не может быть опубликовано.'
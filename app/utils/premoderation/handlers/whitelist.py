@@ -4,10 +4,8 @@ from __future__ import annotations
 import json
 from typing import TYPE_CHECKING
 
-from utils.premoderation.helpers import get_sender_of_message
-
 if TYPE_CHECKING:
-    from telebot.types import Message
+    from ..context import MessageContext
     from ..premoderation import Premoderation
 
 
@@ -25,21 +23,20 @@ class WhiteList(list):
         whitelist = [str(chat_id) for chat_id in whitelist]
         super().__init__(whitelist)
 
-    def is_whitelisted(self, message: Message) -> bool:
+    def is_whitelisted(self, context: MessageContext) -> bool:
         """Check message sender for whitelist.
 
         Args:
-            `message (Message)`: message
+            `context (MessageContext)`: message context
 
         Returns:
             `bool`: is message sender in whitelist
         """
 
-        sender_chat_id = get_sender_of_message(message)['chat_id']
-        return sender_chat_id in self
+        return context.sender['chat_id'] in self
 
-    def validate(self, message: Message) -> Premoderation.Status:
+    def validate(self, context: MessageContext) -> Premoderation.Status:
         """Validate message sender for whitelist."""
-        if self.is_whitelisted(message):
+        if self.is_whitelisted(context):
             return self.whitelist()
         return self.valid()
@@ -3,7 +3,8 @@
 from __future__ import annotations
 
 import logging
-from typing import TYPE_CHECKING
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Callable, Tuple
 
 from telebot.types import Message
 
@@ -11,6 +12,29 @@ if TYPE_CHECKING:
     from bot import Bot
 
 
+def offload(validator: Callable) -> Callable:
+    """Mark CPU-bound validator to run in thread pool instead of event loop."""
+    validator.offload = True
+    return validator
+
+
+def timed(func: Callable, *args) -> Tuple[Any, float]:
+    """Call function, return its result and duration in seconds.
+
+    Duration is measured where function runs, e.g. in worker thread, so it
+    does not include waiting in queue of thread pool.
+    """
+    started = perf_counter()
+    result = func(*args)
+    return result, perf_counter() - started
+
+
+def content_only(validator: Callable) -> Callable:
+    """Mark validator, which result depends only on text and media of message."""
+    validator.content_only = True
+    return validator
+
+
 def get_sender_of_message(message: Message):
     """Get sender of message."""
     result = {
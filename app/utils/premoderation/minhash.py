@@ -0,0 +1,154 @@
+"""MinHash module.
+
+MinHash signature of text allows to estimate Jaccard similarity of sets of
+character shingles of two texts by comparing fixed number of values.
+Signature is computed by one permutation hashing: each shingle is hashed
+once, the hash selects one of `PERMUTATIONS` bins and the bin keeps the
+minimal hash. Empty bins of short texts are filled from the next non-empty
+bin, so equal bins still mean equal minimums.
+`MinHashIndex` finds similar signatures with locality-sensitive hashing:
+signature is split into bands and only signatures, which share a whole band
+with the looked up one, are compared.
+"""
+from __future__ import annotations
+
+from array import array
+from base64 import b64decode, b64encode
+from collections import deque
+from hashlib import blake2b
+import re
+from time import time
+from typing import Deque, Dict, List, Tuple
+
+# 16 bands of 4 values: signatures of texts with similarity 0.7 share
+# a band with probability 0.99, with similarity 0.1 - 0.002
+BANDS = 16
+ROWS = 4
+PERMUTATIONS = BANDS * ROWS
+SHINGLE = 4
+# Texts with fewer words are too short to tell duplicate from similar offer
+MIN_WORDS = 5
+
+# Bin is selected by the lowest bits of shingle hash, the rest is its value
+BIN_BITS = PERMUTATIONS.bit_length() - 1
+_EMPTY = 1 << 64
+# Added per bin of distance to value of empty bin, so filled bins differ from their donor
+_FILL_OFFSET = 0x9E37
+
+WORD_RE = re.compile(r'\w+')
+TAG_RE = re.compile(r'<[^>]+>')
+
+# (timestamp, signature, sender chat id)
+Entry = Tuple[float, bytes, str]
+
+
+def shingles(html_text: str) -> set[str] | None:
+    """Get character shingles of normalized text, None if text is too short."""
+    words = WORD_RE.findall(TAG_RE.sub(' ', html_text).lower())
+    if len(words) < MIN_WORDS:
+        return None
+    text = ' '.join(words)
+    return {text[start:start + SHINGLE] for start in range(len(text) - SHINGLE + 1)}
+
+
+def signature(html_text: str) -> bytes | None:
+    """Get MinHash signature of text, 16-bit value per permutation.
+
+    Returns:
+        `bytes | None`: Signature, None if text is too short.
+    """
+    text_shingles = shingles(html_text)
+    if text_shingles is None:
+        return None
+    values = [_EMPTY] * PERMUTATIONS
+    for shingle in text_shingles:
+        # blake2b is stable across restarts, builtin `hash` is salted per process
+        value = int.from_bytes(blake2b(shingle.encode(), digest_size=8).digest(), 'little')
+        index, value = value & (PERMUTATIONS - 1), value >> BIN_BITS
+        if value < values[index]:
+            values[index] = value
+
+    # Walk bins backwards from the last non-empty one, wrapping around
+    last = max(index for index, value in enumerate(values) if value != _EMPTY)
+    donor, distance = values[last], 0
+    for index in range(last - 1, last - PERMUTATIONS, -1):
+        if values[index] == _EMPTY:
+            distance += 1
+            values[index] = donor + distance * _FILL_OFFSET
+        else:
+            donor, distance = values[index], 0
+    return array('H', [value & 0xFFFF for value in values]).tobytes()
+
+
+def similarity(first: bytes, second: bytes) -> float:
+    """Estimate Jaccard similarity of texts by their signatures."""
+    return sum(a == b for a, b in zip(array('H', first), array('H', second))) / PERMUTATIONS
+
+
+class MinHashIndex:
+    """Rolling index of signatures added in the last `window` seconds.
+
+    Lookup takes `BANDS` dict lookups and compares only signatures sharing
+    a band, so it does not depend on number of entries.
+    """
+
+    band_size = ROWS * array('H').itemsize
+
+    def __init__(self, window: float, threshold: float = 0.6):
+        self.window = window
+        self.threshold = threshold
+        self.entries: Deque[Entry] = deque()
+        # Buckets keep entries in insertion order, so expired entry is the first one
+        self.tables: List[Dict[bytes, Deque[Entry]]] = [{} for _ in range(BANDS)]
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def bands(self, text_signature: bytes) -> List[bytes]:
+        """Split signature into bands."""
+        return [text_signature[start:start + self.band_size]
+                for start in range(0, len(text_signature), self.band_size)]
+
+    def add(self, text_signature: bytes, sender_id: str, now: float | None = None) -> None:
+        """Add signature to index."""
+        now = now or time()
+        self.purge(now)
+        entry = (now, text_signature, sender_id)
+        self.entries.append(entry)
+        for table, band in zip(self.tables, self.bands(text_signature)):
+            table.setdefault(band, deque()).append(entry)
+
+    def find(self, text_signature: bytes, now: float | None = None) -> List[Entry]:
+        """Find entries, which are similar to signature."""
+        self.purge(now or time())
+        candidates = {}
+        for table, band in zip(self.tables, self.bands(text_signature)):
+            for entry in table.get(band, ()):
+                candidates[id(entry)] = entry
+        return [entry for entry in candidates.values()
+                if similarity(entry[1], text_signature) >= self.threshold]
+
+    def purge(self, now: float) -> None:
+        """Drop entries out of window."""
+        threshold = now - self.window
+        while self.entries and self.entries[0][0] <= threshold:
+            entry = self.entries.popleft()
+            for table, band in zip(self.tables, self.bands(entry[1])):
+                bucket = table[band]
+                if bucket[0] is entry:
+                    bucket.popleft()
+                else:
+                    bucket.remove(entry)
+                if not bucket:
+                    del table[band]
+
+    def dump(self) -> List:
+        """Get compact JSON serializable state."""
+        return [[int(added), b64encode(text_signature).decode(), sender_id]
+                for added, text_signature, sender_id in self.entries]
+
+    def load(self, dump: List) -> None:
+        """Load state from `dump` result."""
+        for added, text_signature, sender_id in sorted(dump, key=lambda entry: entry[0]):
+            if added > time() - self.window:
+                self.add(b64decode(text_signature), sender_id, now=added)
@@ -2,23 +2,45 @@
 
 from __future__ import annotations
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import logging
 from enum import Enum
-from typing import TYPE_CHECKING
-
-from telebot.types import Message
+from time import perf_counter
+from typing import TYPE_CHECKING, Callable, Dict, List, Tuple
 
 from utils.database import BannedSenders
 
 from .handlers import (EmojiTool, WhiteList, Length,
-                       BannedUsersValidationHandler)
+                       BannedUsersValidationHandler, Duplicates, StopWords, Links, Quota)
+from .helpers import timed
+from .stats import ValidatorStats
+from .verdicts import Verdict, VerdictCache
 
 if TYPE_CHECKING:
     from bot import Bot
+    from .context import MessageContext
+
+# Validators are reordered by their statistics every REORDER_EVERY messages
+REORDER_EVERY = 100
 
 
 class Premoderation:  # pylint: disable=too-few-public-methods
-    """Premoderation class."""
+    """Premoderation class.
+
+    Validators run until the first non-valid result. The first `pinned`
+    validators (whitelist) always run first, the rest are reordered at runtime
+    by their latency and decline rate to minimize expected time until decline.
+
+    Plain validators run inline on the event loop. Coroutine validators and
+    validators marked with `offload` (run in thread pool) are started after
+    the inline ones pass and run concurrently, the first decline cancels
+    the rest.
+
+    Verdicts of validators marked with `content_only` and moderators' declines
+    are cached by content key, so repeated content skips content checks or is
+    declined at once.
+    """
 
     def __init__(self, bot: Bot, logger: logging.Logger) -> None:
         """Initialize class."""
@@ -28,6 +50,7 @@ class Premoderation:  # pylint: disable=too-few-public-methods
         self.log = logger
         self.emoji_tool = EmojiTool(self)
         self.length_tool = Length(self)
+        self.links_tool = Links(self)
 
         def is_banned_callback(sender):
             return BannedSenders().has(sender.get('chat_id'))
@@ -36,6 +59,11 @@ class Premoderation:  # pylint: disable=too-few-public-methods
             self, is_banned_callback)
 
         self.whitelist = WhiteList(self)
+        self.duplicates: Duplicates | None = None
+        self.stop_words: StopWords | None = None
+        self.quota: Quota | None = None
+        # Called with context of each validated message
+        self.on_valid: List[Callable[[MessageContext], None]] = []
 
         self._limits = {
             'caption': 1024,
@@ -46,19 +74,195 @@ class Premoderation:  # pylint: disable=too-few-public-methods
             self.whitelist.validate,
             self.banned_validator.validate,
         ]
+        self.pinned = 1
+        self.stats: Dict[Callable, ValidatorStats] = {}
+        # Keep duration of every validator call, used by benchmarks
+        self.keep_samples = False
+        self._order: List[Callable] | None = None
+        self._processed = 0
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='premoderation')
+        self.verdicts = VerdictCache()
 
-    def process_message(self, message: Message) -> bool:
+    async def process_message(self, context: MessageContext) -> dict:
         """Process message."""
-        for validator in self.validators:
-            res = validator(message)
-            self.log.info("Validator result: %s", res)
-            if res.get('status') is not Premoderation.Status.VALID:
-                self.log.info("Message is declined on premoderation: %s", res)
+        if self._order is None or self._processed % REORDER_EVERY == 0:
+            self.reorder()
+        self._processed += 1
+
+        pinned, validators = self._order[:self.pinned], self._order[self.pinned:]
+        for validator in pinned:
+            if (res := self._run_inline(validator, context)) is not None:
+                return res
+
+        res, validators = await self._apply_verdict(context, validators)
+        if res is not None:
+            return res
+
+        background = []
+        for validator in validators:
+            if self.is_background(validator):
+                background.append(validator)
+            elif (res := self._run_inline(validator, context)) is not None:
                 return res
 
-        self.log.info("Message is validated on premoderation: %s", res)
+        if (res := await self._collect_background(background, context)) is not None:
+            return res
+
+        self.log.info("Message is validated on premoderation")
+        self.verdicts.put(context.content_key, Verdict())
+        for callback in self.on_valid:
+            callback(context)
         return self.Status.valid()
 
+    async def _apply_verdict(self, context: MessageContext, validators: List[Callable]
+                             ) -> Tuple[dict | None, List[Callable]]:
+        """Apply cached verdict on content of message, if any.
+
+        Returns:
+            `Tuple[dict | None, List[Callable]]`: Result, if message is declined,
+                and validators left to run. Content-only validators are skipped
+                for content known to be valid.
+        """
+        if (verdict := self.verdicts.get(context.content_key)) is None:
+            return None, validators
+        if (res := await self.check_verdict(verdict, context)) is not None:
+            return res, validators
+        if not verdict.declined:
+            validators = [validator for validator in validators
+                          if not getattr(validator, 'content_only', False)]
+        return None, validators
+
+    async def _collect_background(self, background: List[Callable],
+                                  context: MessageContext) -> dict | None:
+        """Run background validators concurrently, stop on the first decline.
+
+        Returns:
+            `dict | None`: Result, if message is declined.
+        """
+        pending = {asyncio.ensure_future(self._run_background(validator, context))
+                   for validator in background}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    validator, res, elapsed = task.result()
+                    if self.check_result(validator, res, elapsed, context):
+                        return res
+        finally:
+            for task in pending:
+                task.cancel()
+        return None
+
+    def _run_inline(self, validator: Callable, context: MessageContext) -> dict | None:
+        """Run validator on the event loop.
+
+        Returns:
+            `dict | None`: Result, if message is declined.
+        """
+        started = perf_counter()
+        res = validator(context)
+        if self.check_result(validator, res, perf_counter() - started, context):
+            return res
+        return None
+
+    def check_result(self, validator: Callable, res: dict, elapsed: float,
+                     context: MessageContext) -> bool:
+        """Register validator result.
+
+        Returns:
+            `bool`: Is message declined by validator.
+        """
+        declined = res.get('status') is not Premoderation.Status.VALID
+        self.get_stats(validator).add(elapsed, declined)
+        self.log.info("Validator result: %s", res)
+        if declined:
+            self.log.info("Message is declined on premoderation: %s", res)
+            if getattr(validator, 'content_only', False):
+                self.verdicts.put(context.content_key, Verdict(validator))
+        return declined
+
+    async def check_verdict(self, verdict: Verdict, context: MessageContext) -> dict | None:
+        """Apply cached verdict on content of message.
+
+        Validator, which declined the content, is run again to get decline
+        text for the sender, verdict is dropped if content is valid now.
+        Offloaded validator is run in thread pool as in the pipeline.
+
+        Returns:
+            `dict | None`: Result, if message is declined.
+        """
+        if verdict.reason is not None:
+            self.log.info("Message is declined by cached moderator verdict")
+            return self.Status.decline(
+                VerdictCache.Messages.DECLINED.value % (context.user_link, verdict.reason),
+                'Verdicts')
+        if verdict.validator is None:
+            return None
+
+        if self.is_background(verdict.validator):
+            _, res, _ = await self._run_background(verdict.validator, context)
+        else:
+            res = verdict.validator(context)
+        if res.get('status') is Premoderation.Status.VALID:
+            self.verdicts.pop(context.content_key)
+            return None
+        self.log.info("Message is declined by cached verdict: %s", res)
+        return res
+
+    def remember_decline(self, content_key: str | None, reason: str) -> None:
+        """Cache moderator's decline of content."""
+        if content_key is not None:
+            self.verdicts.put(content_key, Verdict(reason=reason))
+
+    async def remember_accept(self, html_text: str, sender_id: str) -> None:
+        """Remember post published by moderator, so its duplicates are declined."""
+        if self.duplicates is not None:
+            await self.duplicates.add(html_text, sender_id)
+
+    @staticmethod
+    def is_background(validator: Callable) -> bool:
+        """Check if validator does not run inline on the event loop."""
+        return asyncio.iscoroutinefunction(validator) or getattr(validator, 'offload', False)
+
+    async def _run_background(self, validator: Callable,
+                              context: MessageContext) -> Tuple[Callable, dict, float]:
+        """Run coroutine or offloaded validator.
+
+        Offloaded validator is timed in worker thread, so its duration does not
+        include waiting for a free worker.
+        """
+        if asyncio.iscoroutinefunction(validator):
+            started = perf_counter()
+            res = await validator(context)
+            return validator, res, perf_counter() - started
+        res, elapsed = await asyncio.get_running_loop().run_in_executor(
+            self.executor, timed, validator, context)
+        return validator, res, elapsed
+
+    def add_validator(self, validator: Callable) -> None:
+        """Add validator to pipeline."""
+        self.validators.append(validator)
+        self._order = None
+
+    def reorder(self) -> None:
+        """Sort not pinned validators by expected cost until decline."""
+        pinned, rest = self.validators[:self.pinned], self.validators[self.pinned:]
+        self._order = pinned + sorted(rest, key=lambda validator: self.get_stats(validator).rank)
+        self.log.debug("Validators order: %s",
+                       [self.get_stats(validator).name for validator in self._order])
+
+    def get_stats(self, validator: Callable) -> ValidatorStats:
+        """Get statistics of validator."""
+        if (stats := self.stats.get(validator)) is None:
+            stats = self.stats[validator] = ValidatorStats(validator.__qualname__,
+                                                           self.keep_samples)
+        return stats
+
+    def stats_report(self) -> List[Dict]:
+        """Get statistics of validators in the current order."""
+        return [self.get_stats(validator).as_dict()
+                for validator in self._order or self.validators]
+
     def get_limit(self, key: str, fallback=None) -> int:
         """Get limit value"""
         return self._limits.get(key, fallback)
@@ -69,19 +273,39 @@ class Premoderation:  # pylint: disable=too-few-public-methods
 
     def limit_caption(self, val: int = 1024) -> None:
         """Set caption limit."""
-        self.validators.append(self.length_tool.caption_validate)
+        self.add_validator(self.length_tool.caption_validate)
         self.set_limit('caption', val)
 
     def limit_text(self, val: int = 4096) -> None:
         """Set text limit."""
-        self.validators.append(self.length_tool.text_validate)
+        self.add_validator(self.length_tool.text_validate)
         self.set_limit('text',  val)
 
     def limit_emoji(self, val: int = 5) -> None:
         """Set emoji limit."""
-        self.validators.append(self.emoji_tool.validate)
+        self.add_validator(self.emoji_tool.validate)
         self.set_limit('emoji', val)
 
+    def forbid_links(self) -> None:
+        """Decline messages with links."""
+        self.add_validator(self.links_tool.validate)
+
+    def reject_duplicates(self, days: int = 7, threshold: float = 0.6) -> None:
+        """Decline near-duplicates of the sender's posts for given number of days."""
+        self.duplicates = Duplicates(self, days, threshold)
+        self.add_validator(self.duplicates.validate)
+
+    def limit_posts(self, limit: int, hours: float = 24) -> None:
+        """Allow each sender `limit` posts in any `hours` hours."""
+        self.quota = Quota(self, limit, hours * 60 * 60)
+        self.add_validator(self.quota.validate)
+        self.on_valid.append(self.quota.add)
+
+    def filter_stop_words(self, path: str = 'stop_words.txt') -> None:
+        """Decline messages with stop words from file."""
+        self.stop_words = StopWords(self, path)
+        self.add_validator(self.stop_words.validate)
+
     class Status(Enum):
         """Premoderation status enum."""
         DECLINE = 0
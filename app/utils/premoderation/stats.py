@@ -0,0 +1,64 @@
+"""Premoderation validators statistics module."""
+from __future__ import annotations
+
+from typing import Dict, List
+
+
+class ValidatorStats:
+    """Latency and decline rate of validator.
+
+    Every non-valid result stops the pipeline, so it is counted as decline.
+    Durations of all calls are kept in `samples` only if it is enabled.
+    """
+
+    __slots__ = ('name', 'calls', 'declines', 'time', 'samples')
+
+    def __init__(self, name: str, samples: bool = False) -> None:
+        self.name = name
+        self.calls = 0
+        self.declines = 0
+        self.time = 0.0
+        self.samples: List[float] | None = [] if samples else None
+
+    def add(self, elapsed: float, declined: bool) -> None:
+        """Register validator call.
+
+        Args:
+            `elapsed (float)`: Call duration in seconds.
+            `declined (bool)`: Is message declined by validator.
+        """
+        self.calls += 1
+        self.declines += declined
+        self.time += elapsed
+        if self.samples is not None:
+            self.samples.append(elapsed)
+
+    @property
+    def mean_time(self) -> float:
+        """Mean call duration in seconds."""
+        return self.time / self.calls if self.calls else 0.0
+
+    @property
+    def decline_rate(self) -> float:
+        """Smoothed decline rate, unseen validator gets 0.5."""
+        return (self.declines + 1) / (self.calls + 2)
+
+    @property
+    def rank(self) -> float:
+        """Expected cost of validator per stopped pipeline, lower goes first.
+
+        Sorting independent checks by cost / decline probability minimizes
+        expected cost until the first decline.
+        """
+        return self.mean_time / self.decline_rate
+
+    def as_dict(self) -> Dict:
+        """Get statistics as dict."""
+        return {
+            'name': self.name,
+            'calls': self.calls,
+            'declines': self.declines,
+            'decline_rate': self.declines / self.calls if self.calls else 0.0,
+            'mean_time': self.mean_time,
+            'time': self.time,
+        }
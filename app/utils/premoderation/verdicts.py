@@ -0,0 +1,79 @@
+"""Premoderation verdicts cache module."""
+from __future__ import annotations
+
+from collections import OrderedDict
+from enum import Enum
+from time import monotonic
+from typing import Callable, NamedTuple, Tuple
+
+
+class Verdict(NamedTuple):
+    """Verdict on content of message.
+
+    Either the content validator, which declined the message, moderator's
+    decline reason, or neither of them, if content was valid.
+    """
+    validator: Callable | None = None
+    reason: str | None = None
+
+    @property
+    def declined(self) -> bool:
+        """Is content declined."""
+        return self.validator is not None or self.reason is not None
+
+
+class VerdictCache:
+    """LRU cache of verdicts by content key with expiration.
+
+    Args:
+        `maxsize (int)`: Number of kept verdicts, the least recently used are dropped first.
+        `ttl (float)`: Seconds, verdict is kept since it was set.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 60 * 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.__verdicts: OrderedDict[str, Tuple[float, Verdict]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__verdicts)
+
+    def get(self, key: str) -> Verdict | None:
+        """Get verdict by content key."""
+        item = self.__verdicts.get(key)
+        if item is None or item[0] <= monotonic():
+            if item is not None:
+                del self.__verdicts[key]
+            self.misses += 1
+            return None
+        self.__verdicts.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def put(self, key: str, verdict: Verdict) -> None:
+        """Set verdict of content key."""
+        self.__verdicts[key] = (monotonic() + self.ttl, verdict)
+        self.__verdicts.move_to_end(key)
+        while len(self.__verdicts) > self.maxsize:
+            self.__verdicts.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        """Drop verdict of content key."""
+        self.__verdicts.pop(key, None)
+
+    def stats(self) -> dict:
+        """Get hit and miss counters."""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': len(self),
+        }
+
+    class Messages(Enum):
+        """Verdicts cache messages."""
+        DECLINED = ('%s, такое объявление уже было отклонено модератором.'
+                    '\n\n<b>Причина:</b>\n%s')
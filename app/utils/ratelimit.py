@@ -0,0 +1,162 @@
+"""Rate limits module.
+
+Limiters keep their state in memory by arbitrary hashable keys, e.g.
+`(chat_id, command)` or `(user_id, command)`, and optionally persist it
+to snapshot file.
+"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections import deque
+from time import time
+from typing import Dict, Hashable, List, Tuple
+
+from utils.storages import Snapshot
+
+# Idle keys are purged every PURGE_EVERY hits
+PURGE_EVERY = 1000
+
+
+class RateLimit(ABC):
+    """Base class of rate limiters.
+
+    Args:
+        `snapshot (str | None)`: Snapshot file, state is not persisted if not set.
+        `snapshot_interval (float)`: Seconds between the first change and writing.
+    """
+
+    def __init__(self, snapshot: str | None = None, snapshot_interval: float = 60.0):
+        self.states: Dict[Tuple[Hashable, ...], object] = {}
+        self.snapshot = None
+        self._hits = 0
+        if snapshot is not None:
+            self.snapshot = Snapshot(snapshot, self.dump, snapshot_interval)
+            self.load(self.snapshot.load([]))
+
+    def hit(self, *key: Hashable, cost: int = 1) -> bool:
+        """Register call by key.
+
+        Returns:
+            `bool`: Is call allowed, denied calls are not registered.
+        """
+        now = time()
+        allowed = self.consume(key, now, cost)
+        if allowed:
+            self._hits += 1
+            if self._hits % PURGE_EVERY == 0:
+                self.purge(now)
+            if self.snapshot is not None:
+                self.snapshot.changed()
+        return allowed
+
+    def purge(self, now: float | None = None) -> None:
+        """Drop states of keys, which are not limited anymore."""
+        now = now or time()
+        for key in [key for key, state in self.states.items() if self.is_idle(state, now)]:
+            del self.states[key]
+
+    def dump(self) -> List:
+        """Get JSON serializable state."""
+        return [[list(key), state] for key, state in self.states.items()]
+
+    def load(self, dump: List) -> None:
+        """Load state from `dump` result."""
+        for key, state in dump:
+            self.states[tuple(key)] = self.restore(state)
+
+    @abstractmethod
+    def consume(self, key: Tuple[Hashable, ...], now: float, cost: int) -> bool:
+        """Try to register call by key."""
+
+    @abstractmethod
+    def retry_after(self, *key: Hashable) -> float:
+        """Seconds until the next call by key is allowed."""
+
+    @abstractmethod
+    def is_idle(self, state, now: float) -> bool:
+        """Check if state does not limit calls anymore."""
+
+    def restore(self, state):
+        """Restore state from snapshot."""
+        return state
+
+
+class TokenBucket(RateLimit):
+    """Token bucket rate limiter.
+
+    Each key has bucket of `capacity` tokens, which is refilled with `capacity`
+    tokens per `period` seconds. Bucket with capacity 1 is a plain cooldown.
+    """
+
+    def __init__(self, capacity: int, period: float, **kwargs):
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+        super().__init__(**kwargs)
+
+    def tokens(self, state: List[float] | None, now: float) -> float:
+        """Get number of tokens in bucket."""
+        if state is None:
+            return self.capacity
+        tokens, updated = state
+        return min(self.capacity, tokens + (now - updated) * self.rate)
+
+    def consume(self, key: Tuple[Hashable, ...], now: float, cost: int) -> bool:
+        tokens = self.tokens(self.states.get(key), now)
+        if tokens < cost:
+            return False
+        self.states[key] = [tokens - cost, now]
+        return True
+
+    def retry_after(self, *key: Hashable, cost: int = 1) -> float:
+        tokens = self.tokens(self.states.get(key), time())
+        return max(0.0, (cost - tokens) / self.rate)
+
+    def is_idle(self, state: List[float], now: float) -> bool:
+        return self.tokens(state, now) >= self.capacity
+
+
+class SlidingWindow(RateLimit):
+    """Sliding window rate limiter.
+
+    Allows `limit` calls per key in any `window` seconds. Only the last `limit`
+    call times are kept per key, so both memory and time per call are O(limit).
+    """
+
+    def __init__(self, limit: int, window: float, **kwargs):
+        self.limit = limit
+        self.window = window
+        super().__init__(**kwargs)
+
+    def consume(self, key: Tuple[Hashable, ...], now: float, cost: int) -> bool:
+        if cost > self.limit:
+            return False
+        calls = self.states.get(key)
+        if calls is None:
+            calls = self.states[key] = deque(maxlen=self.limit)
+        # Call is allowed, if the (limit - cost + 1)-th latest call is out of window
+        if len(calls) + cost > self.limit \
+                and calls[len(calls) - self.limit + cost - 1] > now - self.window:
+            return False
+        calls.extend([now] * cost)
+        return True
+
+    def count(self, *key: Hashable) -> int:
+        """Number of calls by key in the current window."""
+        threshold = time() - self.window
+        return sum(1 for called in self.states.get(key, ()) if called > threshold)
+
+    def retry_after(self, *key: Hashable, cost: int = 1) -> float:
+        calls = self.states.get(key, ())
+        if len(calls) + cost <= self.limit:
+            return 0.0
+        return max(0.0, calls[len(calls) - self.limit + cost - 1] + self.window - time())
+
+    def is_idle(self, state: deque, now: float) -> bool:
+        return not state or state[-1] <= now - self.window
+
+    def dump(self) -> List:
+        return [[list(key), list(calls)] for key, calls in self.states.items()]
+
+    def restore(self, state: List[float]) -> deque:
+        return deque(state, maxlen=self.limit)
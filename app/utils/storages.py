@@ -0,0 +1,320 @@
+"""Storages module.
+
+Contains TinyDB storage with crash-safe writes, write-behind caching
+middleware, which coalesces writes of the JSON databases, and snapshots
+of in-memory stores.
+"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import asyncio
+import atexit
+from copy import deepcopy
+import json
+import os
+import sys
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Any, Callable, Dict, Tuple
+from weakref import WeakSet
+
+from tinydb.middlewares import Middleware
+from tinydb.storages import Storage
+
+from utils.logger import log
+
+# Single worker keeps background writes of the same file in order
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='storage-writer')
+_flushable: WeakSet[WriteBehind] = WeakSet()
+
+
+def atomic_write(path: str | Path, text: str, encoding: str = 'utf8') -> None:
+    """Write text to file through temp file and rename.
+
+    File is either fully replaced or left untouched, if process dies during writing.
+    """
+    path = Path(path)
+    with NamedTemporaryFile('w', encoding=encoding, dir=path.parent,
+                            prefix=f'.{path.name}.', suffix='.tmp', delete=False) as file:
+        file.write(text)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(file.name, path)
+
+
+class AtomicJSONStorage(Storage):
+    """JSON storage, which replaces the file atomically on every write."""
+
+    def __init__(self, path: str, encoding: str = 'utf8', **kwargs):
+        self.path = Path(path)
+        self.encoding = encoding
+        self.kwargs = kwargs
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.touch(exist_ok=True)
+
+    def stamp(self) -> Tuple[int, int] | None:
+        """Get inode and modification time of file, they change on every write."""
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def read(self) -> Dict | None:
+        """Read data from file."""
+        text = self.path.read_text(encoding=self.encoding)
+        if not text:
+            return None
+        return json.loads(text)
+
+    def write(self, data: Dict) -> None:
+        """Write data to file."""
+        self.write_text(self.dumps(data))
+
+    def dumps(self, data: Dict) -> str:
+        """Serialize data."""
+        return json.dumps(data, **self.kwargs)
+
+    def write_text(self, text: str) -> None:
+        """Write serialized data to file."""
+        atomic_write(self.path, text, self.encoding)
+
+
+class WriteBehind(ABC):
+    """Base class of objects, which write their state to disk in background.
+
+    State is written by `persist`, when `threshold` changes are accumulated or
+    `interval` seconds passed since the first unsaved change. Without running
+    event loop changes are written immediately.
+    """
+
+    def __init__(self, interval: float = 5.0, threshold: int = 100):
+        self.interval = interval
+        self.threshold = threshold
+        self.dirty = 0
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._pending_write: Future | None = None
+        _flushable.add(self)
+
+    def changed(self) -> None:
+        """Count change and schedule flush."""
+        self.dirty += 1
+        if self.dirty >= self.threshold:
+            self.flush()
+            return
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush(wait=True)
+            return
+        self._flush_handle = loop.call_later(self.interval, self.flush)
+
+    def flush(self, wait: bool = False) -> None:
+        """Write state to disk.
+
+        Args:
+            `wait (bool)`: Block until state is written.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        if wait and self._pending_write is not None:
+            self._pending_write.result()
+            self._pending_write = None
+
+        if not self.dirty:
+            return
+        changes, self.dirty = self.dirty, 0
+        self.persist(wait)
+        log.debug('%s flushed, %s changes coalesced', self, changes)
+
+    @abstractmethod
+    def persist(self, wait: bool) -> None:
+        """Write state to disk.
+
+        Args:
+            `wait (bool)`: Write in the current thread.
+        """
+
+
+class WriteBehindFile(WriteBehind):
+    """Base class of write-behind objects, which keep serialized state in file.
+
+    Serialization runs on the event loop, disk writes are done by the
+    background writer thread.
+    """
+
+    def persist(self, wait: bool) -> None:
+        """Serialize state and write it to disk.
+
+        Args:
+            `wait (bool)`: Write in the current thread.
+        """
+        text = self.dumps()
+        if wait:
+            # Also used on interpreter shutdown, when writer thread is not available
+            self.write_text(text)
+        else:
+            self._pending_write = _writer.submit(self.write_text, text)
+
+    @abstractmethod
+    def dumps(self) -> str:
+        """Serialize state."""
+
+    @abstractmethod
+    def write_text(self, text: str) -> None:
+        """Write serialized state to disk."""
+
+
+class WriteBehindMiddleware(WriteBehindFile, Middleware):
+    """Write-behind caching middleware for TinyDB.
+
+    Keeps database in memory, so reads only check, that the file was not
+    changed, and coalesces writes as described in `WriteBehindFile`.
+
+    File may be changed by another process, e.g. `commands.py`. Change is
+    noticed by inode and modification time of the file: data is reloaded on
+    the next read and before flush, unsaved changes are merged into it by
+    `merge_tables`. Change made between serialization and writing of a flush
+    is still overwritten.
+    """
+
+    def __init__(self, storage_cls=AtomicJSONStorage, interval: float = 5.0,
+                 threshold: int = 100):
+        WriteBehindFile.__init__(self, interval, threshold)
+        Middleware.__init__(self, storage_cls)
+        self.cache: Dict | None = None
+        # Data and stamp of the file as it was last read or written
+        self.base: Dict | None = None
+        self.stamp: Tuple[int, int] | None = None
+        # Increased on every reload, so users can drop what they derived from data
+        self.version = 0
+
+    def __repr__(self) -> str:
+        return f'Storage {getattr(self.storage, "path", self.storage)}'
+
+    def read(self) -> Dict | None:
+        """Read data from cache, reload it, if file was changed."""
+        self.refresh()
+        return self.cache
+
+    def refresh(self) -> None:
+        """Reload data, if file was changed since it was last read or written."""
+        if self.cache is not None and self.stamp == self.storage.stamp():
+            return
+        self.stamp = self.storage.stamp()
+        base = self.storage.read()
+        if self.cache is not None:
+            log.info('%s was changed by another process, reloaded', self)
+            self.cache = merge_tables(self.base or {}, self.cache, deepcopy(base or {}))
+        else:
+            self.cache = deepcopy(base)
+        self.base = base
+        self.version += 1
+
+    def write(self, data: Dict) -> None:
+        """Write data to cache and schedule flush."""
+        self.cache = data
+        self.changed()
+
+    def persist(self, wait: bool) -> None:
+        """Merge changes of another process and write data to disk."""
+        self.refresh()
+        super().persist(wait)
+
+    def dumps(self) -> str:
+        """Serialize cached data."""
+        text = self.storage.dumps(self.cache)
+        # Separate copy, as TinyDB changes documents of cache in place
+        self.base = json.loads(text)
+        return text
+
+    def write_text(self, text: str) -> None:
+        """Write serialized data to storage."""
+        self.storage.write_text(text)
+        self.stamp = self.storage.stamp()
+
+    def close(self) -> None:
+        """Flush data and close storage."""
+        self.flush(wait=True)
+        self.storage.close()
+
+
+def merge_tables(base: Dict, local: Dict, external: Dict) -> Dict:
+    """Merge changes made in memory into TinyDB data changed by another process.
+
+    Documents added, changed or removed in memory since `base` replace those
+    of `external`, the rest are taken from `external`. Document added in both
+    under the same id is added from memory under a new id.
+
+    Args:
+        `base (Dict)`: Tables as they were last read or written.
+        `local (Dict)`: Tables in memory.
+        `external (Dict)`: Tables in the changed file, they are changed in place.
+
+    Returns:
+        `Dict`: Merged tables.
+    """
+    for name in local.keys() | base.keys():
+        base_table = base.get(name, {})
+        local_table = local.get(name, {})
+        table = external.setdefault(name, {})
+        for doc_id in base_table.keys() - local_table.keys():
+            table.pop(doc_id, None)
+        for doc_id, document in local_table.items():
+            if base_table.get(doc_id) == document:
+                continue
+            if doc_id not in base_table and table.get(doc_id, document) != document:
+                doc_id = str(max(map(int, table)) + 1)
+            table[doc_id] = document
+    return external
+
+
+class Snapshot(WriteBehindFile):
+    """JSON snapshot of in-memory state.
+
+    Args:
+        `path (str | Path)`: Snapshot file.
+        `state (Callable)`: Returns JSON serializable state.
+        `interval (float)`: Seconds between the first change and writing.
+    """
+
+    def __init__(self, path: str | Path, state: Callable[[], Any], interval: float = 60.0):
+        super().__init__(interval, threshold=sys.maxsize)
+        self.path = Path(path)
+        self.state = state
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def __repr__(self) -> str:
+        return f'Snapshot {self.path}'
+
+    def load(self, default: Any = None) -> Any:
+        """Read last written state, `default` if there is no valid snapshot."""
+        try:
+            return json.loads(self.path.read_text(encoding='utf8'))
+        except (FileNotFoundError, ValueError):
+            return default
+
+    def dumps(self) -> str:
+        """Serialize state."""
+        return json.dumps(self.state())
+
+    def write_text(self, text: str) -> None:
+        """Write serialized state to snapshot file."""
+        atomic_write(self.path, text)
+
+
+def flush_all() -> None:
+    """Flush all write-behind storages and snapshots and wait until data is written."""
+    for item in list(_flushable):
+        try:
+            item.flush(wait=True)
+        except Exception:  # pylint: disable=broad-except
+            log.exception('%s flush failed', item)
+
+
+atexit.register(flush_all)